@@ -1,38 +1,1042 @@
+import csv
+import hashlib
+import mmap
+import multiprocessing
+import os
+import random
 import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from multiprocessing import shared_memory
+
+# Cache settings: answers are reused for CACHE_TTL seconds, failures for NEGATIVE_TTL
+CACHE_TTL = 300
+NEGATIVE_TTL = 30
+MAX_CACHE_ENTRIES = 4096
+
+# Hot entries are refreshed in the background before they expire, and expired
+# answers are served for up to STALE_GRACE seconds while a refresh runs or the
+# upstream is down (RFC 8767 serve-stale)
+PREFETCH_WINDOW = 0.1  # last fraction of an answer's TTL in which a hot entry gets refreshed
+PREFETCH_MIN_HITS = 3  # hits since the last refresh that make an entry hot
+STALE_GRACE = 60
+STALE_RECHECK = 30     # seconds after a failed refresh before stale hits try upstream again
+
+# Shared cache settings: with use_shared_cache(), worker processes on one host also
+# share answers through a fixed-size table in shared memory (see SharedCache)
+SHARED_CACHE_SLOTS = 16384  # entries in the table, about 9 MB
+SHARED_CACHE_BUCKET = 8     # slots an entry may occupy, probed together
+SHARED_CACHE_STRIPES = 64   # write locks, each guarding every 64th bucket
+
+# Thread-pool settings for bulk lookups
+RESOLVER_WORKERS = 8
+RESOLVER_QUEUE_SIZE = 32  # lookups allowed in flight before the caller blocks
+LOOKUP_TIMEOUT = 5.0      # per-lookup deadline in seconds, counted from when the lookup starts
+
+# DNS-over-TCP settings: when NAMESERVERS is set, lookups skip the system resolver
+# and go to these servers over a pool of persistent, pipelined TCP connections
+NAMESERVERS = []          # e.g. ["10.0.0.53", "10.0.0.54:5353"]
+CONNECTIONS_PER_SERVER = 2
+RECONNECT_MIN_BACKOFF = 0.5
+RECONNECT_MAX_BACKOFF = 30.0
+
+# Capture enrichment settings
+PCAP_MAX_FLOWS = 100000   # flows tracked one by one; any beyond this are summed into one row
+
+_cache = {}     # (record type, key) -> (value, error, expires_at, ttl)
+_inflight = {}  # (record type, key) -> [Event, entry] for the lookup in progress
+_hot = {}       # (record type, key) -> hits since the entry was last refreshed
+_recheck = {}   # (record type, key) -> when to retry upstream after a failed refresh
+_prefetched = set()  # (record type, key) already prefetched once in its entry's lifetime
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "prefetches": 0}
+_clock = time.monotonic  # what expiry, backoff and lookup deadlines are measured against; see set_clock()
+_shared = None  # SharedCache behind the per-process cache, if any; see use_shared_cache()
+
+# Clock that only moves when told to, so TTL expiry can be tested without waiting
+class FakeClock:
+    def __init__(self, start=0.0):
+        self.now = start
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+# Make the resolver measure time with clock(), or with time.monotonic again when None
+def set_clock(clock=None):
+    global _clock
+    _clock = clock or time.monotonic
+
+# Forget every cached answer and zero the statistics of this process (the shared table is left alone)
+def reset_cache():
+    with _lock:
+        _cache.clear()
+        _hot.clear()
+        _recheck.clear()
+        _prefetched.clear()
+        for name in _stats:
+            _stats[name] = 0
+
+# Cache table shared by the processes on one host, in a multiprocessing.shared_memory
+# segment. Entries live in fixed-size slots grouped into buckets of SHARED_CACHE_BUCKET;
+# an entry hashes to one bucket and takes a free, expired or else the soonest-expiring
+# slot there. Reads take no lock: every slot carries a sequence number that a writer
+# makes odd while it rewrites the slot, and a reader retries if the number was odd or
+# changed under it. Writers serialize on one of SHARED_CACHE_STRIPES locks per bucket.
+# Expiry is absolute _clock() time, which time.monotonic keeps consistent across the
+# processes of one host. Create it once in the parent and hand it to each worker
+# (fork, or a multiprocessing.Process argument), which calls use_shared_cache(cache);
+# pass the multiprocessing context the workers are started with, if not the default.
+class SharedCache:
+    SLOT = struct.Struct("<IBBBxHHiQdd")  # seq, state, rtype, error kind, key len, value len, errno, hash, expires at, ttl
+    KEY_MAX = 255
+    VALUE_MAX = 255
+    SLOT_SIZE = SLOT.size + KEY_MAX + VALUE_MAX
+    EMPTY, ANSWER, FAILURE = 0, 1, 2
+    RTYPES = {"A": 1, "PTR": 12}
+    ERRORS = {socket.gaierror: 1, socket.herror: 2}  # anything else comes back as OSError
+    ERROR_TYPES = {kind: error for error, kind in ERRORS.items()}
+
+    def __init__(self, slots=SHARED_CACHE_SLOTS, stripes=SHARED_CACHE_STRIPES, context=None):
+        self.buckets = max(1, slots // SHARED_CACHE_BUCKET)
+        # A new segment starts zeroed, i.e. every slot EMPTY
+        self.shm = shared_memory.SharedMemory(create=True, size=self.buckets * SHARED_CACHE_BUCKET * self.SLOT_SIZE)
+        self.locks = [(context or multiprocessing).Lock() for _ in range(stripes)]
+        self.owner = os.getpid()  # a forked worker inherits the object, not the ownership
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    # A worker gets the segment's name and the locks, and maps the segment itself
+    def __getstate__(self):
+        return self.shm.name, self.buckets, self.locks
+
+    def __setstate__(self, state):
+        name, self.buckets, self.locks = state
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _bucket(self, rtype, key):
+        raw = key.encode()
+        digest = int.from_bytes(hashlib.blake2b(b"%d %s" % (self.RTYPES[rtype], raw), digest_size=8).digest(), "little")
+        first = digest % self.buckets * SHARED_CACHE_BUCKET
+        return raw, digest, range(first * self.SLOT_SIZE, (first + SHARED_CACHE_BUCKET) * self.SLOT_SIZE, self.SLOT_SIZE)
+
+    # Consistent copy of one slot, or None if writers kept changing it
+    def _read(self, offset):
+        buf = self.shm.buf
+        for _ in range(100):
+            seq = struct.unpack_from("<I", buf, offset)[0]
+            if seq & 1:
+                continue
+            data = bytes(buf[offset:offset + self.SLOT_SIZE])
+            if struct.unpack_from("<I", buf, offset)[0] == seq:
+                return data
+        return None
+
+    def _matches(self, data, rtype, raw, digest):
+        _, state, code, _, key_len, _, _, slot_hash, _, _ = self.SLOT.unpack_from(data)
+        return (state != self.EMPTY and slot_hash == digest and code == self.RTYPES[rtype]
+                and data[self.SLOT.size:self.SLOT.size + key_len] == raw)
+
+    # Cache entry for (rtype, key) that is still valid and expires after newer_than, or None
+    def get(self, rtype, key, newer_than=0.0):
+        raw, digest, offsets = self._bucket(rtype, key)
+        now = _clock()
+        for offset in offsets:
+            data = self._read(offset)
+            if data is None or not self._matches(data, rtype, raw, digest):
+                continue
+            _, state, _, kind, key_len, value_len, errno, _, expires_at, ttl = self.SLOT.unpack_from(data)
+            if expires_at <= max(now, newer_than):
+                break
+            self.stats["hits"] += 1
+            start = self.SLOT.size + self.KEY_MAX
+            text = data[start:start + value_len].decode()
+            if state == self.ANSWER:
+                return (text, None, expires_at, ttl)
+            return (None, self.ERROR_TYPES.get(kind, OSError)(errno, text), expires_at, ttl)
+        self.stats["misses"] += 1
+        return None
+
+    # Publish a cache entry; keys, answers or errors that don't fit a slot are skipped
+    def put(self, rtype, key, entry):
+        value, error, expires_at, ttl = entry
+        if error is not None and not isinstance(error, OSError):
+            return
+        text = (value if error is None else str(error.strerror or error)).encode()
+        raw, digest, offsets = self._bucket(rtype, key)
+        if len(raw) > self.KEY_MAX or len(text) > self.VALUE_MAX:
+            return
+        state = self.ANSWER if error is None else self.FAILURE
+        kind = 0 if error is None else self.ERRORS.get(type(error), 0)
+        errno = 0 if error is None else error.errno or 0
+        buf = self.shm.buf
+        with self.locks[offsets[0] // (self.SLOT_SIZE * SHARED_CACHE_BUCKET) % len(self.locks)]:
+            target, soonest = None, None
+            for offset in offsets:
+                data = bytes(buf[offset:offset + self.SLOT_SIZE])
+                if self._matches(data, rtype, raw, digest):
+                    target = offset
+                    break
+                fields = self.SLOT.unpack_from(data)
+                expires = -1.0 if fields[1] == self.EMPTY else fields[8]
+                if soonest is None or expires < soonest:
+                    target, soonest = offset, expires
+            seq = struct.unpack_from("<I", buf, target)[0]
+            struct.pack_into("<I", buf, target, seq + 1)  # odd: readers retry
+            self.SLOT.pack_into(buf, target, seq + 1, state, self.RTYPES[rtype], kind, len(raw), len(text),
+                                errno, digest, expires_at, ttl)
+            start = target + self.SLOT.size
+            buf[start:start + len(raw)] = raw
+            buf[start + self.KEY_MAX:start + self.KEY_MAX + len(text)] = text
+            struct.pack_into("<I", buf, target, (seq + 2) & 0xFFFFFFFF)
+        self.stats["stores"] += 1
+
+    # Unmap the segment; the process that created it also removes it
+    def close(self):
+        self.shm.close()
+        if self.owner == os.getpid():
+            self.shm.unlink()
+
+# Put a SharedCache behind this process's cache, or stop using one when None
+def use_shared_cache(cache=None):
+    global _shared
+    _shared = cache
+
+# Run one upstream lookup and turn its outcome into a cache entry.
+# lookup(key) returns (value, ttl); a ttl of None means "use CACHE_TTL".
+# With a shared cache, an entry another process already fetched (and that is newer
+# than the one this process holds) is used instead, and new entries are published.
+def _lookup_entry(cache_key, lookup):
+    shared = _shared
+    if shared is not None:
+        held = _cache.get(cache_key)
+        entry = shared.get(*cache_key, newer_than=held[2] if held is not None else 0.0)
+        if entry is not None:
+            return entry
+    try:
+        value, ttl = lookup(cache_key[1])
+        ttl = CACHE_TTL if ttl is None else min(ttl, CACHE_TTL)
+        entry = (value, None, _clock() + ttl, ttl)
+    except Exception as e:  # shared with every waiter, then re-raised
+        entry = (None, e, _clock() + NEGATIVE_TTL, NEGATIVE_TTL)
+    if shared is not None:
+        shared.put(*cache_key, entry)
+    return entry
+
+# Save a lookup result, keeping a still-servable answer if the refresh failed.
+# A failed refresh also holds off the next one for STALE_RECHECK seconds, so an
+# outage doesn't turn every stale hit into another upstream query.
+# Must be called with _lock held; returns the entry callers should see.
+def _store(cache_key, entry):
+    old = _cache.get(cache_key)
+    now = _clock()
+    if (entry[1] is not None and old is not None and old[1] is None
+            and old[2] + STALE_GRACE > now):
+        _recheck[cache_key] = now + STALE_RECHECK
+        return old
+    if cache_key not in _cache and len(_cache) >= MAX_CACHE_ENTRIES:
+        evicted = next(iter(_cache))  # drop the oldest entry
+        del _cache[evicted]
+        _hot.pop(evicted, None)
+        _recheck.pop(evicted, None)
+        _prefetched.discard(evicted)
+    _cache[cache_key] = entry
+    _hot.pop(cache_key, None)
+    _recheck.pop(cache_key, None)
+    _prefetched.discard(cache_key)
+    return entry
+
+# Do the upstream lookup for an in-flight key and wake everyone waiting on it
+def _refresh(cache_key, lookup, flight):
+    entry = _lookup_entry(cache_key, lookup)
+    with _lock:
+        entry = _store(cache_key, entry)
+        del _inflight[cache_key]
+    flight[1] = entry
+    flight[0].set()
+    return entry
+
+# Look up key through the cache, calling lookup(key) only on a miss or expired entry.
+# Concurrent callers asking for the same key wait for one shared upstream lookup.
+def _cached(rtype, key, lookup):
+    cache_key = (rtype, key)
+    flight = None
+    with _lock:
+        now = _clock()
+        entry = _cache.get(cache_key)
+        if entry is not None and entry[2] > now:
+            _stats["hits"] += 1
+            _hot[cache_key] = hits = _hot.get(cache_key, 0) + 1
+            mode = "serve"
+            # Only answers are prefetched, once per lifetime and only in the last
+            # PREFETCH_WINDOW of their TTL; a cached failure just runs out
+            if (entry[1] is None and cache_key not in _inflight and cache_key not in _prefetched
+                    and hits >= PREFETCH_MIN_HITS and entry[2] - now < entry[3] * PREFETCH_WINDOW):
+                _stats["prefetches"] += 1
+                _prefetched.add(cache_key)
+                mode = "serve+refresh"
+        elif entry is not None and entry[1] is None and entry[2] + STALE_GRACE > now:
+            _stats["stale"] += 1
+            if cache_key in _inflight or _recheck.get(cache_key, now) > now:
+                mode = "serve"
+            else:
+                mode = "serve+refresh"
+        elif cache_key in _inflight:
+            _stats["coalesced"] += 1
+            flight, mode = _inflight[cache_key], "wait"
+        else:
+            _stats["misses"] += 1
+            mode = "lookup"
+        if mode in ("serve+refresh", "lookup"):
+            flight = _inflight[cache_key] = [threading.Event(), None]
+
+    if mode == "serve+refresh":
+        threading.Thread(target=_refresh, args=(cache_key, lookup, flight), daemon=True).start()
+    elif mode == "lookup":
+        entry = _refresh(cache_key, lookup, flight)
+    elif mode == "wait":
+        flight[0].wait()
+        entry = flight[1]
+
+    value, error = entry[:2]
+    if error is not None:
+        raise error
+    return value
+
+# Hit rate and approximate memory use of this process's cache, plus how often this
+# process found its misses in the shared cache and the size of the mapped table
+def cache_stats():
+    lookups = _stats["hits"] + _stats["misses"]
+    stats = {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "coalesced": _stats["coalesced"],
+        "stale": _stats["stale"],
+        "prefetches": _stats["prefetches"],
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        "entries": len(_cache),
+        "bytes": sys.getsizeof(_cache) + sum(sys.getsizeof(e) for e in _cache.values()),
+    }
+    if _shared is not None:
+        shared_lookups = _shared.stats["hits"] + _shared.stats["misses"]
+        stats.update({
+            "shared_hits": _shared.stats["hits"],
+            "shared_misses": _shared.stats["misses"],
+            "shared_hit_rate": _shared.stats["hits"] / shared_lookups if shared_lookups else 0.0,
+            "shared_bytes": _shared.shm.size,
+        })
+    return stats
+
+# System resolver backend (glibc / OS), used unless NAMESERVERS is configured
+def _system_forward(domain):
+    return socket.gethostbyname(domain), None
+
+def _system_reverse(ip):
+    return socket.gethostbyaddr(ip)[0], None  # [0] = hostname
+
+_forward_lookup = _system_forward
+_reverse_lookup = _system_reverse
+
+# ---- DNS-over-TCP backend ----
+QTYPE_A = 1
+QTYPE_PTR = 12
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+
+# Encode a domain name as DNS labels
+def _encode_name(name):
+    out = bytearray()
+    for label in name.rstrip(".").split("."):
+        try:
+            raw = label.encode("idna")
+        except UnicodeError:
+            raw = b""
+        if not 0 < len(raw) < 64:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        out += bytes([len(raw)]) + raw
+    return bytes(out + b"\0")
+
+# Build the question section for one name and record type; a name that can't be
+# encoded raises gaierror here, before any connection is involved
+def _build_question(name, qtype):
+    return _encode_name(name) + struct.pack("!HH", qtype, 1)
+
+# Put a recursive query header with msg_id in front of a question
+def _build_query(msg_id, question):
+    return struct.pack("!HHHHHH", msg_id, 0x0100, 1, 0, 0, 0) + question
+
+# Read a possibly compressed name, returning it and the offset just past it
+def _read_name(msg, offset):
+    labels, end = [], None
+    for _ in range(128):  # bounds compression-pointer loops
+        length = msg[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | msg[offset + 1]
+        elif length == 0:
+            return ".".join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(msg[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+            offset += 1 + length
+    raise ValueError("Malformed DNS name")
+
+# Parse a response into (rcode, [(value, ttl), ...]) for records of qtype
+def _parse_response(msg, qtype):
+    _, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", msg)
+    offset = 12
+    for _ in range(qdcount):
+        offset = _read_name(msg, offset)[1] + 4
+    answers = []
+    for _ in range(ancount):
+        offset = _read_name(msg, offset)[1]
+        rtype, _, ttl, rdlength = struct.unpack_from("!HHIH", msg, offset)
+        offset += 10
+        if rtype == qtype == QTYPE_A and rdlength == 4:
+            answers.append((socket.inet_ntoa(msg[offset:offset + 4]), ttl))
+        elif rtype == qtype == QTYPE_PTR:
+            answers.append((_read_name(msg, offset)[0], ttl))
+        offset += rdlength
+    return flags & 0xF, answers
+
+# One persistent TCP connection carrying many in-flight queries, matched by message ID
+class _DnsConnection:
+    def __init__(self, address, timeout=LOOKUP_TIMEOUT):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.sock.settimeout(None)
+        self.send_lock = threading.Lock()
+        self.pending = {}  # message id -> [Event, response bytes]
+        self.next_id = random.randrange(1 << 16)
+        self.alive = True
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _recv_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Nameserver closed the connection")
+            data += chunk
+        return data
+
+    def _read_loop(self):
+        try:
+            while True:
+                msg = self._recv_exact(struct.unpack("!H", self._recv_exact(2))[0])
+                waiter = self.pending.pop(struct.unpack_from("!H", msg)[0], None)
+                if waiter is not None:
+                    waiter[1] = msg
+                    waiter[0].set()
+        except (OSError, struct.error):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        with self.send_lock:
+            waiters, self.pending = list(self.pending.values()), {}
+        for waiter in waiters:
+            waiter[0].set()  # no response: the query failed with the connection
+
+    def query(self, question, qtype, timeout):
+        waiter = [threading.Event(), None]
+        with self.send_lock:
+            if not self.alive:
+                raise ConnectionError("Connection is closed")
+            while self.next_id in self.pending:
+                self.next_id = (self.next_id + 1) & 0xFFFF
+            msg_id, self.next_id = self.next_id, (self.next_id + 1) & 0xFFFF
+            query = _build_query(msg_id, question)
+            self.pending[msg_id] = waiter
+            try:
+                self.sock.sendall(struct.pack("!H", len(query)) + query)
+            except OSError:
+                self.pending.pop(msg_id, None)
+                raise
+        if not waiter[0].wait(timeout):
+            self.pending.pop(msg_id, None)
+            raise socket.timeout("DNS query timed out")
+        if waiter[1] is None:
+            raise ConnectionError("Connection closed before the answer arrived")
+        return _parse_response(waiter[1], qtype)
+
+# Pool of connections to the configured nameservers, with reconnect backoff.
+# Connections are dialled in the background, one dial per slot at a time, so a
+# slow or unreachable server never holds up lookups that a healthy one can answer.
+class _NameserverPool:
+    def __init__(self, servers, per_server=CONNECTIONS_PER_SERVER, timeout=LOOKUP_TIMEOUT):
+        self.timeout = timeout
+        self.slots = []
+        for server in servers:
+            host, _, port = server.rpartition(":") if server.count(":") == 1 else (server, "", "")
+            self.slots += [((host, int(port or 53)), i) for i in range(per_server)]
+        self.connections = {}  # slot -> _DnsConnection
+        self.dialing = set()   # slots with a connect in progress
+        self.backoff = {}      # address -> (retry at, current backoff)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)  # notified when a dial finishes
+
+    # Push the next reconnect to this address further out. Must be called with self.lock held.
+    def _back_off(self, address):
+        backoff = self.backoff.get(address, (0.0, 0.0))[1]
+        backoff = min(backoff * 2, RECONNECT_MAX_BACKOFF) if backoff else RECONNECT_MIN_BACKOFF
+        self.backoff[address] = (_clock() + backoff, backoff)
+
+    def _dial(self, slot):
+        try:
+            conn = _DnsConnection(slot[0], self.timeout)
+        except OSError:
+            conn = None
+        with self.lock:
+            self.dialing.discard(slot)
+            if conn is None:
+                self._back_off(slot[0])
+            elif self.closed:
+                conn.close()
+            else:
+                self.connections[slot] = conn
+                self.backoff.pop(slot[0], None)
+            self.changed.notify_all()
+
+    # Live connections, least busy first; dead ones are dropped and redialled after
+    # their backoff. Must be called with self.lock held.
+    def _live_connections(self):
+        if self.closed:
+            return []
+        live = []
+        for slot in self.slots:
+            conn = self.connections.get(slot)
+            if conn is not None and conn.alive:
+                live.append(conn)
+                continue
+            if conn is not None:  # lost since the last lookup
+                del self.connections[slot]
+                self._back_off(slot[0])
+            if slot not in self.dialing and _clock() >= self.backoff.get(slot[0], (0.0, 0.0))[0]:
+                self.dialing.add(slot)
+                threading.Thread(target=self._dial, args=(slot,), daemon=True).start()
+        live.sort(key=lambda c: len(c.pending))
+        return live
+
+    # Send the query on the least busy live connection, failing over to the others
+    # when a connection breaks. All attempts, including waiting for a first
+    # connection, share one timeout, so a server that doesn't answer can't hold
+    # the caller for the timeout once per connection.
+    def query(self, name, qtype):
+        question = _build_question(name, qtype)
+        deadline = time.monotonic() + self.timeout
+        with self.lock:
+            conns = self._live_connections()
+            while not conns and self.dialing and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+                conns = self._live_connections()
+        for conn in conns:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return conn.query(question, qtype, remaining)
+            except socket.timeout:
+                break
+            except OSError:
+                continue
+        raise ConnectionError("No nameserver answered")
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            conns = list(self.connections.values())
+        for conn in conns:
+            conn.close()
+
+_pool = None
+
+def _tcp_forward(domain):
+    try:
+        rcode, answers = _pool.query(domain, QTYPE_A)
+    except socket.gaierror:
+        raise  # the name itself can't be queried
+    except (OSError, ValueError, IndexError, struct.error):
+        raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+    if rcode == RCODE_NXDOMAIN or (rcode == 0 and not answers):
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    if rcode != 0:
+        raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+    return answers[0]
+
+def _tcp_reverse(ip):
+    try:
+        socket.inet_aton(ip)
+    except OSError:
+        raise socket.herror(1, "Unknown host")
+    try:
+        rcode, answers = _pool.query(".".join(reversed(ip.split("."))) + ".in-addr.arpa", QTYPE_PTR)
+    except (OSError, ValueError, IndexError, struct.error):
+        raise socket.herror(2, "Host name lookup failure")
+    if rcode == RCODE_NXDOMAIN or (rcode == 0 and not answers):
+        raise socket.herror(1, "Unknown host")
+    if rcode != 0:
+        raise socket.herror(2, "Host name lookup failure")
+    return answers[0]
+
+# Switch lookups to DNS-over-TCP against the given "host" or "host:port" servers,
+# or back to the system resolver when servers is empty
+def use_tcp_nameservers(servers, per_server=CONNECTIONS_PER_SERVER, timeout=LOOKUP_TIMEOUT):
+    global _pool, _forward_lookup, _reverse_lookup
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+    if servers:
+        _pool = _NameserverPool(servers, per_server, timeout)
+        _forward_lookup, _reverse_lookup = _tcp_forward, _tcp_reverse
+    else:
+        _forward_lookup, _reverse_lookup = _system_forward, _system_reverse
 
 # Method: URL -> IP
 def url_to_ip(domain):
     try:
-        return socket.gethostbyname(domain)
+        return _cached("A", domain, _forward_lookup)
     except socket.gaierror:
         return "Invalid domain name"
 
 # Method: IP -> URL
 def ip_to_url(ip):
     try:
-        return socket.gethostbyaddr(ip)[0]  # [0] = hostname
+        return _cached("PTR", ip, _reverse_lookup)
     except socket.herror:
         return "Invalid IP address"
 
-# Main loop
-while True:
-    print("\nChoose an option:")
-    print("1. IP to URL")
-    print("2. URL to IP")
-    print("3. Exit")
-    choice = input("Enter your choice (1/2/3): ")
-    
-    if choice == "1":
-        ip = input("Enter IP address: ")
-        print("URL:", ip_to_url(ip))
-    elif choice == "2":
-        domain = input("Enter domain name: ")
-        print("IP:", url_to_ip(domain))
-    elif choice == "3":
-        print("Exiting...")
-        break
+# Run a pool lookup, recording when a worker actually picked it up
+def _started_call(lookup, item, started):
+    started.append(_clock())
+    return lookup(item)
+
+# Wait for a future until _clock() reaches deadline. The wait is cut into short
+# slices so that a FakeClock moved by another thread can end it too.
+def _wait_until(future, deadline):
+    while not future.done():
+        remaining = deadline - _clock()
+        if remaining <= 0:
+            raise FutureTimeout()
+        wait([future], timeout=min(remaining, 0.05))
+    return future.result()
+
+# Wait for one pool lookup. It gets up to timeout to reach a worker, then its
+# own timeout from when it started; on either deadline the future is cancelled.
+# A lookup already running can't be cancelled, so it still holds its worker.
+def _result_by(future, started, timeout):
+    try:
+        if not started:
+            try:
+                return _wait_until(future, _clock() + timeout)
+            except FutureTimeout:
+                if future.cancel():  # still queued
+                    return "Lookup timed out"
+        begun = started[0] if started else _clock()  # a worker may not have recorded it yet
+        return _wait_until(future, begun + timeout)
+    except FutureTimeout:
+        future.cancel()
+        return "Lookup timed out"
+
+# Method: many lookups on a thread pool, results yielded in input order.
+# At most queue_size lookups are pending at once, so a long input applies
+# backpressure instead of piling up futures in memory. Each lookup's deadline
+# counts from when a worker starts it, so time spent queued doesn't use it up.
+def resolve_many(items, lookup=url_to_ip, workers=RESOLVER_WORKERS,
+                 queue_size=RESOLVER_QUEUE_SIZE, timeout=LOOKUP_TIMEOUT):
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for item in items:
+            started = []
+            pending.append((pool.submit(_started_call, lookup, item, started), started, timeout))
+            if len(pending) >= queue_size:
+                yield _result_by(*pending.popleft())
+        while pending:
+            yield _result_by(*pending.popleft())
+    finally:
+        # A blocked resolver call can't be interrupted, so don't wait on it
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# ---- Packet capture enrichment ----
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (12, 101, 228)
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+# Walk a classic pcap file, yielding (linktype, data offset, captured length, wire length)
+def _pcap_records(mm):
+    magic = mm[:4]
+    if magic in (b"\xd4\xc3\xb2\xa1", b"\x4d\x3c\xb2\xa1"):
+        endian = "<"
+    elif magic in (b"\xa1\xb2\xc3\xd4", b"\xa1\xb2\x3c\x4d"):
+        endian = ">"
+    else:
+        raise ValueError("Not a pcap or pcapng file")
+    if len(mm) < 24:
+        raise ValueError("Truncated pcap header")
+    linktype = struct.unpack_from(endian + "I", mm, 20)[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + "IIII")
+    offset, size = 24, len(mm)
+    while offset + 16 <= size:
+        _, _, caplen, origlen = record.unpack_from(mm, offset)
+        offset += 16
+        yield linktype, offset, min(caplen, size - offset), origlen
+        offset += caplen
+
+# Walk a pcapng file, yielding the same tuples from enhanced and simple packet blocks.
+# A final block cut short (e.g. a capture still being written) ends the walk.
+def _pcapng_records(mm):
+    offset, size = 0, len(mm)
+    endian, linktypes = "<", []
+    while offset + 12 <= size:
+        block_type = struct.unpack_from(endian + "I", mm, offset)[0]
+        if block_type == 0x0A0D0D0A:  # section header: byte order may change here
+            endian = "<" if mm[offset + 8:offset + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+            linktypes = []
+        block_length = struct.unpack_from(endian + "I", mm, offset + 4)[0]
+        if block_length < 12:
+            raise ValueError("Corrupt pcapng block")
+        if offset + block_length > size:
+            break
+        if block_type == 1:  # interface description
+            linktypes.append(struct.unpack_from(endian + "H", mm, offset + 8)[0])
+        elif block_type == 6:  # enhanced packet
+            if block_length < 32:
+                raise ValueError("Corrupt pcapng block")
+            interface, _, _, caplen, origlen = struct.unpack_from(endian + "IIIII", mm, offset + 8)
+            if interface >= len(linktypes):
+                raise ValueError("Packet block before its interface description")
+            yield linktypes[interface], offset + 28, min(caplen, block_length - 32), origlen
+        elif block_type == 3:  # simple packet
+            if block_length < 16:
+                raise ValueError("Corrupt pcapng block")
+            if not linktypes:
+                raise ValueError("Packet block before its interface description")
+            origlen = struct.unpack_from(endian + "I", mm, offset + 8)[0]
+            yield linktypes[0], offset + 12, min(origlen, block_length - 16), origlen
+        offset += block_length
+
+# Offset of the IPv4 header inside a captured frame, or None if it isn't IPv4
+def _ipv4_offset(mm, linktype, offset, caplen):
+    if linktype == LINKTYPE_ETHERNET:
+        pos, ethertype = 14, int.from_bytes(mm[offset + 12:offset + 14], "big")
+        while ethertype in (0x8100, 0x88A8) and pos + 4 <= caplen:  # VLAN tags
+            ethertype = int.from_bytes(mm[offset + pos + 2:offset + pos + 4], "big")
+            pos += 4
+        if ethertype != 0x0800:
+            return None
+    elif linktype in LINKTYPE_RAW:
+        pos = 0
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if mm[offset + 14:offset + 16] != b"\x08\x00":
+            return None
+        pos = 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if mm[offset:offset + 2] != b"\x08\x00":
+            return None
+        pos = 20
+    elif linktype == LINKTYPE_NULL:
+        if mm[offset:offset + 4] not in (b"\x02\x00\x00\x00", b"\x00\x00\x00\x02"):
+            return None
+        pos = 4
     else:
-        print("Invalid choice, try again.")
+        return None
+    if pos + 20 > caplen or mm[offset + pos] >> 4 != 4:
+        return None
+    return offset + pos
+
+# Walk a capture through mmap and yield (src, dst, protocol, sport, dport, length) per IPv4 packet
+def _capture_packets(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        records = _pcapng_records(mm) if mm[:4] == b"\x0a\x0d\x0d\x0a" else _pcap_records(mm)
+        for linktype, offset, caplen, origlen in records:
+            ip = _ipv4_offset(mm, linktype, offset, caplen)
+            if ip is None:
+                continue
+            header_length = (mm[ip] & 0x0F) * 4
+            protocol = mm[ip + 9]
+            src, dst = struct.unpack_from("!II", mm, ip + 12)
+            sport = dport = 0
+            first_fragment = struct.unpack_from("!H", mm, ip + 6)[0] & 0x1FFF == 0
+            if protocol in (6, 17) and first_fragment and ip + header_length + 4 <= offset + caplen:
+                sport, dport = struct.unpack_from("!HH", mm, ip + header_length)
+            yield src, dst, protocol, sport, dport, origlen
+
+def _int_to_ip(address):
+    return socket.inet_ntoa(address.to_bytes(4, "big"))
+
+# Method: summarize a pcap/pcapng file per IPv4 flow and write it as CSV, with the
+# addresses of each tracked flow reverse-resolved. Flows past PCAP_MAX_FLOWS only
+# count towards the "(other flows)" row, so their addresses are never looked up.
+def enrich_capture(pcap_path, csv_path):
+    flows = {}  # (src, dst, protocol, sport, dport) -> [packets, bytes]
+    other = [0, 0]
+    packets = 0
+    for src, dst, protocol, sport, dport, length in _capture_packets(pcap_path):
+        packets += 1
+        key = (src, dst, protocol, sport, dport)
+        counters = flows.get(key)
+        if counters is None:
+            if len(flows) < PCAP_MAX_FLOWS:
+                counters = flows[key] = [0, 0]
+            else:
+                counters = other
+        counters[0] += 1
+        counters[1] += length
+
+    addresses = sorted({address for key in flows for address in key[:2]})
+    names = dict(zip(addresses, resolve_many(map(_int_to_ip, addresses), lookup=ip_to_url)))
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["src", "src_host", "dst", "dst_host", "protocol", "sport", "dport", "packets", "bytes"])
+        for (src, dst, protocol, sport, dport), (count, size) in sorted(flows.items(), key=lambda item: -item[1][1]):
+            writer.writerow([_int_to_ip(src), names[src], _int_to_ip(dst), names[dst],
+                             protocol, sport, dport, count, size])
+        if other[0]:
+            writer.writerow(["(other flows)", "", "", "", "", "", "", other[0], other[1]])
+    return packets, len(names), len(flows)
+
+# ---- Offline stub nameserver and resolver benchmark ----
+
+# In-process DNS-over-TCP nameserver with programmable behaviour. Every A query
+# gets a made-up 10.x.y.z answer and every PTR query a host-a-b-c-d.in-addr.arpa
+# name (compressed against the question, as real servers do), after `latency` seconds (a number or a (min, max) range). A `loss` fraction of
+# queries is never answered, a `servfail` fraction gets SERVFAIL, names in
+# `nxdomain` get NXDOMAIN, and answers carry `ttl`. The seed makes runs repeatable.
+class StubNameserver:
+    def __init__(self, latency=0.0, loss=0.0, servfail=0.0, ttl=300, nxdomain=(), seed=0):
+        self.latency, self.loss, self.servfail, self.ttl = latency, loss, servfail, ttl
+        self.nxdomain = set(nxdomain)
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = {"queries": 0, "dropped": 0, "servfail": 0}
+        self.connections = set()  # accepted connections, closed along with the server
+        self.closed = False
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.address = "127.0.0.1:%d" % self.server.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        try:
+            while True:
+                conn, _ = self.server.accept()
+                with self.random_lock:
+                    if self.closed:
+                        conn.close()
+                        return
+                    self.connections.add(conn)
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        except OSError:
+            pass  # closed
+
+    def _serve(self, conn):
+        send_lock = threading.Lock()
+        try:
+            with conn, conn.makefile("rb") as stream:
+                while (prefix := stream.read(2)) and len(prefix) == 2:
+                    query = stream.read(struct.unpack("!H", prefix)[0])
+                    with self.random_lock:
+                        self.stats["queries"] += 1
+                        roll = self.random.random()
+                        latency = (self.random.uniform(*self.latency) if isinstance(self.latency, tuple)
+                                   else self.latency)
+                    threading.Thread(target=self._answer, args=(conn, send_lock, query, roll, latency),
+                                     daemon=True).start()
+        except OSError:
+            pass
+        finally:
+            with self.random_lock:
+                self.connections.discard(conn)
+
+    def _answer(self, conn, send_lock, query, roll, latency):
+        if roll < self.loss:
+            with self.random_lock:
+                self.stats["dropped"] += 1
+            return
+        time.sleep(latency)
+        name, offset = _read_name(query, 12)
+        qtype = struct.unpack_from("!H", query, offset)[0]
+        question = query[12:offset + 4]
+        rdata = b""
+        if roll < self.loss + self.servfail:
+            with self.random_lock:
+                self.stats["servfail"] += 1
+            rcode = RCODE_SERVFAIL
+        elif name in self.nxdomain:
+            rcode = RCODE_NXDOMAIN
+        else:
+            rcode = 0
+            if qtype == QTYPE_A:
+                rdata = b"\x0a" + zlib.crc32(name.encode()).to_bytes(4, "big")[1:]
+            elif qtype == QTYPE_PTR:
+                label = ("host-" + "-".join(reversed(name.split(".")[:4]))).encode()
+                suffix = 12 + len(_encode_name(".".join(name.split(".")[:4]))) - 1  # "in-addr.arpa" in the question
+                rdata = bytes([len(label)]) + label + struct.pack("!H", 0xC000 | suffix)
+        answer = struct.pack("!HHIH", qtype, 1, self.ttl, len(rdata)) if rdata else b""
+        response = (query[:2] + struct.pack("!HHHHH", 0x8180 | rcode, 1, 1 if rdata else 0, 0, 0)
+                    + question + (b"\xc0\x0c" + answer + rdata if rdata else b""))
+        try:
+            with send_lock:
+                if not self.closed:
+                    conn.sendall(struct.pack("!H", len(response)) + response)
+        except OSError:
+            pass
+
+    # Stop accepting, and drop every connection being served so no more answers go out
+    def close(self):
+        with self.random_lock:
+            self.closed = True
+            connections, self.connections = self.connections, set()
+        for sock in (self.server, *connections):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # wakes a blocked accept() or read
+            except OSError:
+                pass
+            sock.close()
+
+# Method: benchmark the cached resolver against a stub nameserver, without any network.
+# Lookups follow a skewed popularity curve over `names` distinct names; the fake
+# clock moves `seconds_per_lookup` after each answer, so with the defaults a run
+# covers a few TTLs and TTL expiry, prefetch and serve-stale all happen. Each
+# lookup is bounded by the stub pool's `timeout`. The caller's backend, clock,
+# cache and statistics are put back afterwards. Returns one result dict per worker count.
+def benchmark_resolver(lookups=5000, names=500, workers=(1, 8, 32), latency=(0.001, 0.005),
+                       loss=0.0, servfail=0.0, ttl=60, seconds_per_lookup=0.05, timeout=0.5, seed=0):
+    global _pool, _forward_lookup, _reverse_lookup, _shared
+    saved_backend = (_pool, _forward_lookup, _reverse_lookup, _shared)
+    _shared = None  # the stub's made-up answers stay out of the shared table
+    with _lock:
+        saved_cache = [state.copy() for state in (_cache, _hot, _recheck, _prefetched, _stats)]
+    saved_clock = _clock
+    results = []
+    try:
+        for worker_count in workers:
+            stub = StubNameserver(latency, loss, servfail, ttl, seed=seed)
+            clock = FakeClock()
+            rng = random.Random(seed)
+            workload = [f"host{min(int(rng.paretovariate(1.2)), names)}.bench" for _ in range(lookups)]
+            latencies = []
+
+            def timed(name):
+                started = time.perf_counter()
+                answer = url_to_ip(name)
+                latencies.append(time.perf_counter() - started)
+                return answer
+
+            _pool = None  # keep the caller's pool open; it is restored below
+            use_tcp_nameservers([stub.address], timeout=timeout)
+            set_clock(clock)
+            reset_cache()
+            started = time.perf_counter()
+            try:
+                failures = 0
+                # Fake time jumps ahead with every answer, so leave the deadline to the stub pool
+                for answer in resolve_many(workload, lookup=timed, workers=worker_count,
+                                           queue_size=worker_count * 4, timeout=float("inf")):
+                    failures += not answer.startswith("10.")
+                    clock.advance(seconds_per_lookup)
+                elapsed = time.perf_counter() - started
+            finally:
+                _pool.close()
+                stub.close()
+
+            latencies.sort()
+            stats = cache_stats()
+            results.append({
+                "workers": worker_count,
+                "lookups_per_second": lookups / elapsed,
+                "p50_ms": latencies[len(latencies) // 2] * 1000,
+                "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+                "hit_rate": stats["hit_rate"],
+                "stale": stats["stale"],
+                "prefetches": stats["prefetches"],
+                "upstream_queries": stub.stats["queries"],
+                "failures": failures,
+            })
+    finally:
+        _pool, _forward_lookup, _reverse_lookup, _shared = saved_backend
+        set_clock(saved_clock)
+        with _lock:
+            for state, saved in zip((_cache, _hot, _recheck, _prefetched, _stats), saved_cache):
+                state.clear()
+                state.update(saved)
+    return results
+
+if NAMESERVERS:
+    use_tcp_nameservers(NAMESERVERS)
+
+if __name__ == "__main__":
+    # Main loop
+    while True:
+        print("\nChoose an option:")
+        print("1. IP to URL")
+        print("2. URL to IP")
+        print("3. Bulk URL to IP")
+        print("4. Capture file IPs to URLs")
+        print("5. Resolver benchmark (offline stub nameserver)")
+        print("6. Exit")
+        choice = input("Enter your choice (1/2/3/4/5/6): ")
+
+        if choice == "1":
+            ip = input("Enter IP address: ")
+            print("URL:", ip_to_url(ip))
+        elif choice == "2":
+            domain = input("Enter domain name: ")
+            print("IP:", url_to_ip(domain))
+        elif choice == "3":
+            domains = [d.strip() for d in input("Enter domain names (comma separated): ").split(",") if d.strip()]
+            for domain, ip in zip(domains, resolve_many(domains)):
+                print(f"{domain}: {ip}")
+        elif choice == "4":
+            pcap_path = input("Enter pcap/pcapng file: ")
+            csv_path = input("Enter output CSV file: ")
+            try:
+                packets, hosts, flows = enrich_capture(pcap_path, csv_path)
+                print(f"{packets} IPv4 packets, {hosts} addresses resolved, {flows} flows written to {csv_path}")
+            except (OSError, ValueError) as e:
+                print("Could not read capture:", e)
+        elif choice == "5":
+            print(f"{'Workers':>8} {'Lookups/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'Hit rate':>9} "
+                  f"{'Stale':>6} {'Prefetch':>9} {'Upstream':>9} {'Failed':>7}")
+            for r in benchmark_resolver():
+                print(f"{r['workers']:>8} {r['lookups_per_second']:>10.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                      f"{r['hit_rate']:>9.0%} {r['stale']:>6} {r['prefetches']:>9} {r['upstream_queries']:>9} "
+                      f"{r['failures']:>7}")
+        elif choice == "6":
+            stats = cache_stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['coalesced']} coalesced, {stats['stale']} stale, {stats['prefetches']} prefetches "
+                  f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries, ~{stats['bytes']} bytes")
+            if "shared_hits" in stats:
+                print(f"Shared cache: {stats['shared_hits']} hits, {stats['shared_misses']} misses "
+                      f"({stats['shared_hit_rate']:.0%} hit rate), {stats['shared_bytes']} bytes mapped")
+            print("Exiting...")
+            break
+        else:
+            print("Invalid choice, try again.")
 
 
 
@@ -115,95 +1119,99 @@ URL: bom12s08-in-f14.1e100.net
 ===================================================================================
 """
 
-# Import the socket module - Python's built-in networking library that provides
-# functions for DNS lookups, creating network connections, and handling network protocols
-import socket
-
-# Define a function to convert domain names to IP addresses (Forward DNS Lookup)
-# Parameter: domain - a string containing the domain name (e.g., "google.com")
-# Returns: IP address as string or error message
-def url_to_ip(domain):
-    # Start error handling block - if DNS lookup fails, we catch the exception
-    try:
-        # socket.gethostbyname() performs forward DNS resolution
-        # It contacts DNS servers to find the IP address associated with the domain
-        # Example: gethostbyname("google.com") returns "142.250.67.206"
-        return socket.gethostbyname(domain)
-    # Catch gaierror (Get Address Info Error) - occurs when domain is invalid/non-existent
-    # gaierror is raised when DNS resolution fails (domain doesn't exist, network issues)
-    except socket.gaierror:
-        # Return user-friendly error message instead of crashing the program
-        return "Invalid domain name"
-
-# Define a function to convert IP addresses to hostnames (Reverse DNS Lookup)
-# Parameter: ip - a string containing the IP address (e.g., "8.8.8.8")
-# Returns: hostname as string or error message
-def ip_to_url(ip):
-    # Start error handling for reverse DNS lookup
-    try:
-        # socket.gethostbyaddr() performs reverse DNS resolution
-        # Returns a tuple: (hostname, aliaslist, ipaddrlist)
-        # [0] extracts just the hostname from the tuple
-        # Example: gethostbyaddr("8.8.8.8") returns ("dns.google", [], ["8.8.8.8"])
-        return socket.gethostbyaddr(ip)[0]  # [0] = hostname from the returned tuple
-    # Catch herror (Host Error) - occurs when IP is invalid or has no reverse DNS record
-    # herror is raised when reverse DNS fails (invalid IP, no PTR record)
-    except socket.herror:
-        # Return error message for invalid IP addresses
-        return "Invalid IP address"
-
-# Main program loop - creates an interactive menu system
-# while True creates an infinite loop that runs until explicitly broken
-while True:
-    # Print menu header with newline (\n) for better formatting
-    print("\nChoose an option:")
-    
-    # Display menu options - each print statement shows a different choice
-    print("1. IP to URL")    # Option to convert IP address to hostname
-    print("2. URL to IP")    # Option to convert domain name to IP address  
-    print("3. Exit")         # Option to quit the program
-    
-    # Get user input and store in 'choice' variable
-    # input() displays prompt and waits for user to type and press Enter
-    # Always returns a string, even if user types numbers
-    choice = input("Enter your choice (1/2/3): ")
-    
-    # Check if user selected option 1 (IP to URL conversion)
-    # Note: we compare with string "1", not integer 1
-    if choice == "1":
-        # Prompt user to enter an IP address
-        # Store their input in the 'ip' variable as a string
-        ip = input("Enter IP address: ")
-        
-        # Call our ip_to_url function with user's input
-        # Print "URL:" followed by the result (either hostname or error message)
-        print("URL:", ip_to_url(ip))
-    
-    # elif means "else if" - check if user selected option 2
-    # Only executes if the previous if condition was false
-    elif choice == "2":
-        # Prompt user to enter a domain name
-        # Store their input in the 'domain' variable
-        domain = input("Enter domain name: ")
-        
-        # Call our url_to_ip function with user's domain input
-        # Print "IP:" followed by the result (either IP address or error message)
-        print("IP:", url_to_ip(domain))
-    
-    # Check if user wants to exit (selected option 3)
-    elif choice == "3":
-        # Print goodbye message
-        print("Exiting...")
-        
-        # Break out of the while loop, which ends the program
-        # Without this, the loop would continue forever
-        break
-    
-    # Handle any other input that's not 1, 2, or 3
-    else:
-        # Print error message for invalid menu selection
-        print("Invalid choice, try again.")
-        # Program continues to loop and show menu again
+if __name__ == "__main__":
+    # The walkthrough below runs after the menu above exits; keeping it here means
+    # importing this file doesn't replace the cached url_to_ip/ip_to_url
+
+    # Import the socket module - Python's built-in networking library that provides
+    # functions for DNS lookups, creating network connections, and handling network protocols
+    import socket
+
+    # Define a function to convert domain names to IP addresses (Forward DNS Lookup)
+    # Parameter: domain - a string containing the domain name (e.g., "google.com")
+    # Returns: IP address as string or error message
+    def url_to_ip(domain):
+        # Start error handling block - if DNS lookup fails, we catch the exception
+        try:
+            # socket.gethostbyname() performs forward DNS resolution
+            # It contacts DNS servers to find the IP address associated with the domain
+            # Example: gethostbyname("google.com") returns "142.250.67.206"
+            return socket.gethostbyname(domain)
+        # Catch gaierror (Get Address Info Error) - occurs when domain is invalid/non-existent
+        # gaierror is raised when DNS resolution fails (domain doesn't exist, network issues)
+        except socket.gaierror:
+            # Return user-friendly error message instead of crashing the program
+            return "Invalid domain name"
+
+    # Define a function to convert IP addresses to hostnames (Reverse DNS Lookup)
+    # Parameter: ip - a string containing the IP address (e.g., "8.8.8.8")
+    # Returns: hostname as string or error message
+    def ip_to_url(ip):
+        # Start error handling for reverse DNS lookup
+        try:
+            # socket.gethostbyaddr() performs reverse DNS resolution
+            # Returns a tuple: (hostname, aliaslist, ipaddrlist)
+            # [0] extracts just the hostname from the tuple
+            # Example: gethostbyaddr("8.8.8.8") returns ("dns.google", [], ["8.8.8.8"])
+            return socket.gethostbyaddr(ip)[0]  # [0] = hostname from the returned tuple
+        # Catch herror (Host Error) - occurs when IP is invalid or has no reverse DNS record
+        # herror is raised when reverse DNS fails (invalid IP, no PTR record)
+        except socket.herror:
+            # Return error message for invalid IP addresses
+            return "Invalid IP address"
+
+    # Main program loop - creates an interactive menu system
+    # while True creates an infinite loop that runs until explicitly broken
+    while True:
+        # Print menu header with newline (\n) for better formatting
+        print("\nChoose an option:")
+
+        # Display menu options - each print statement shows a different choice
+        print("1. IP to URL")    # Option to convert IP address to hostname
+        print("2. URL to IP")    # Option to convert domain name to IP address  
+        print("3. Exit")         # Option to quit the program
+
+        # Get user input and store in 'choice' variable
+        # input() displays prompt and waits for user to type and press Enter
+        # Always returns a string, even if user types numbers
+        choice = input("Enter your choice (1/2/3): ")
+
+        # Check if user selected option 1 (IP to URL conversion)
+        # Note: we compare with string "1", not integer 1
+        if choice == "1":
+            # Prompt user to enter an IP address
+            # Store their input in the 'ip' variable as a string
+            ip = input("Enter IP address: ")
+
+            # Call our ip_to_url function with user's input
+            # Print "URL:" followed by the result (either hostname or error message)
+            print("URL:", ip_to_url(ip))
+
+        # elif means "else if" - check if user selected option 2
+        # Only executes if the previous if condition was false
+        elif choice == "2":
+            # Prompt user to enter a domain name
+            # Store their input in the 'domain' variable
+            domain = input("Enter domain name: ")
+
+            # Call our url_to_ip function with user's domain input
+            # Print "IP:" followed by the result (either IP address or error message)
+            print("IP:", url_to_ip(domain))
+
+        # Check if user wants to exit (selected option 3)
+        elif choice == "3":
+            # Print goodbye message
+            print("Exiting...")
+
+            # Break out of the while loop, which ends the program
+            # Without this, the loop would continue forever
+            break
+
+        # Handle any other input that's not 1, 2, or 3
+        else:
+            # Print error message for invalid menu selection
+            print("Invalid choice, try again.")
+            # Program continues to loop and show menu again
 
 
 """
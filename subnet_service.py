@@ -0,0 +1,205 @@
+"""Long-running subnet calculator service speaking newline-delimited JSON.
+
+Each request is one JSON object per line and gets one JSON line back, in order,
+so clients can pipeline as many requests per connection as they like:
+
+    {"id": 1, "op": "subnet", "ip": "192.168.1.0", "prefix": 26}
+    {"id": 2, "op": "class", "ip": "10.1.2.3"}
+    {"id": 3, "op": "enumerate", "ip": "172.16.0.0", "prefix": 22, "offset": 0, "limit": 4}
+    {"id": 4, "op": "stats"}
+
+Usage:
+    python subnet_service.py serve [--host HOST] [--port PORT | --unix PATH]
+    python subnet_service.py bench [--host HOST] [--port PORT | --unix PATH] [--requests N] [--connections C] [--pipeline D]
+"""
+import argparse
+import asyncio
+import functools
+import json
+import random
+import time
+
+from subnetting import calculate_subnetting, identify_class, int_to_ip, network_interval, subnet_ranges, validate_ip
+
+CACHE_SIZE = 65536       # memoized (network, prefix) results kept in the LRU
+MAX_ENUMERATE = 4096     # most subnets returned by one enumerate request
+DRAIN_THRESHOLD = 65536  # buffered response bytes before waiting on the client
+
+def normalize(ip, prefix):
+    """Returns the key that identifies a calculation, so equivalent inputs share a cache entry."""
+    if not isinstance(prefix, int) or not 0 <= prefix <= 32:
+        raise ValueError("prefix must be an integer between 0 and 32")
+    # Reject what calculate_subnetting() would, before masking hides it (e.g. 010.1.1.1)
+    if not isinstance(ip, str) or not validate_ip(ip):
+        raise ValueError("Subnetting is not applicable for IP Class Invalid IP.")
+    # The first octet decides the class, so never mask below /8
+    start, _ = network_interval(f"{ip}/{max(prefix, 8)}")
+    return int_to_ip(start), prefix
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_subnetting(network, prefix):
+    """Memoized calculate_subnetting() for a normalized (network, prefix) key."""
+    return calculate_subnetting(network, prefix)
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_class(ip):
+    """Memoized identify_class()."""
+    return identify_class(ip)
+
+def enumerate_subnets(ip, prefix, offset=0, limit=16):
+    """Lists a slice of the subnets a calculation creates, as dotted-quad ranges.
+
+    offset is the index of the first subnet within the plan, which always starts
+    at the classful network, wherever ip sits inside it.
+    """
+    result = cached_subnetting(*normalize(ip, prefix))
+    classful_network, _ = network_interval(f"{ip}/{result['default_prefix']}")
+    offset = max(0, offset)
+    count = max(0, min(limit, MAX_ENUMERATE, result['total_subnets'] - offset))
+    return [
+        {'network': int_to_ip(network), 'broadcast': int_to_ip(broadcast),
+         'first_host': int_to_ip(first), 'last_host': int_to_ip(last)}
+        for network, broadcast, first, last in subnet_ranges(int_to_ip(classful_network), prefix, count, offset)
+    ]
+
+def cache_stats():
+    """Reports hit/miss counts of the memoization caches."""
+    stats = {}
+    for name, func in (('subnet', cached_subnetting), ('class', cached_class)):
+        info = func.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return stats
+
+def handle_request(line):
+    """Answers one request line with a response dict."""
+    request = {}
+    try:
+        parsed = json.loads(line)
+        if not isinstance(parsed, dict):
+            raise ValueError("request must be a JSON object")
+        request = parsed
+        op = request.get('op')
+        if op == 'subnet':
+            response = {'result': cached_subnetting(*normalize(request['ip'], request['prefix']))}
+        elif op == 'class':
+            response = {'result': cached_class(request['ip'])}
+        elif op == 'enumerate':
+            response = {'result': enumerate_subnets(request['ip'], request['prefix'],
+                                                    request.get('offset', 0), request.get('limit', 16))}
+        elif op == 'stats':
+            response = {'result': cache_stats()}
+        else:
+            raise ValueError(f"unknown op {op!r}")
+    except KeyError as e:
+        response = {'error': f"missing field {e}"}
+    except (ValueError, TypeError) as e:
+        response = {'error': str(e)}
+    if 'id' in request:
+        response['id'] = request['id']
+    return response
+
+async def serve_connection(reader, writer):
+    """Answers pipelined requests on one connection until the client closes it."""
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            writer.write(json.dumps(handle_request(line)).encode() + b"\n")
+            # Only wait on the client once it falls behind, so pipelined requests stay batched
+            if writer.transport.get_write_buffer_size() > DRAIN_THRESHOLD:
+                await writer.drain()
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host, port, unix_path):
+    """Runs the service until interrupted."""
+    if unix_path:
+        server = await asyncio.start_unix_server(serve_connection, unix_path)
+        print(f"Subnet service listening on {unix_path}")
+    else:
+        server = await asyncio.start_server(serve_connection, host, port)
+        print(f"Subnet service listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+async def open_connection(host, port, unix_path):
+    """Connects to the service over TCP or a Unix socket."""
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+async def bench_connection(host, port, unix_path, requests, depth, latencies):
+    """Keeps up to depth requests pipelined on one connection and records each round-trip latency."""
+    reader, writer = await open_connection(host, port, unix_path)
+    window = asyncio.Semaphore(depth)
+    sent = {}
+
+    async def send():
+        for i, request in enumerate(requests):
+            await window.acquire()
+            request['id'] = i
+            sent[i] = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in requests:
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - sent[response['id']])
+        window.release()
+    await sender
+    writer.close()
+
+async def bench(host, port, unix_path, total, connections, depth):
+    """Load generator: repeated subnet/class requests spread over several connections."""
+    rng = random.Random(0)
+    # A few thousand distinct inputs, so the mix repeats the way orchestration traffic does
+    pool = [(f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}", rng.randrange(9, 31))
+            for _ in range(2000)]
+    requests = []
+    for _ in range(total):
+        ip, prefix = rng.choice(pool)
+        requests.append({'op': 'subnet', 'ip': ip, 'prefix': prefix} if rng.random() < 0.9
+                        else {'op': 'class', 'ip': ip})
+
+    latencies = []
+    per_connection = -(-total // connections)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        bench_connection(host, port, unix_path, requests[i:i + per_connection], depth, latencies)
+        for i in range(0, total, per_connection)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {connections} connections, {depth} in flight each, in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    for label, q in (('p50', 0.50), ('p99', 0.99), ('max', 1.0)):
+        print(f"  {label} latency: {latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000:.2f} ms")
+
+    reader, writer = await open_connection(host, port, unix_path)
+    writer.write(b'{"op": "stats"}\n')
+    print(f"  server caches: {json.loads(await reader.readline())['result']}")
+    writer.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Subnet calculator service and load generator.")
+    parser.add_argument("mode", choices=["serve", "bench"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--unix", help="Unix socket path (instead of TCP)")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--pipeline", type=int, default=64, help="requests in flight per connection")
+    args = parser.parse_args()
+
+    try:
+        if args.mode == "serve":
+            asyncio.run(serve(args.host, args.port, args.unix))
+        else:
+            asyncio.run(bench(args.host, args.port, args.unix, args.requests, args.connections, args.pipeline))
+    except KeyboardInterrupt:
+        print("Goodbye!")
@@ -1,4 +1,9 @@
+import bisect
+import heapq
 import ipaddress
+import os
+import sys
+from array import array
 
 def validate_ip(ip):
     """Validates if the IP address is properly formatted."""
@@ -25,6 +30,10 @@ def identify_class(ip):
             return 'D (Multicast)'
         elif 240 <= first_octet <= 254:
             return 'E (Experimental)'
+        elif first_octet == 127:
+            return 'A (Loopback)'
+        elif first_octet == 0:
+            return 'A (Reserved)'
         else:
             return 'Invalid IP'
     except (ValueError, IndexError):
@@ -83,50 +92,597 @@ def display_subnet_ranges(network_ip, new_prefix, total_subnets, ips_per_subnet)
     except Exception as e:
         print(f"Could not calculate subnet ranges: {e}")
 
-def subnetting(ip, new_prefix):
-    """Performs subnetting calculations based on a target CIDR prefix."""
+def calculate_subnetting(ip, new_prefix):
+    """Returns the subnetting figures for an IP and target CIDR prefix, raising ValueError if not applicable."""
     ip_class = identify_class(ip)
     if ip_class not in ['A', 'B', 'C']:
-        print(f"Subnetting is not applicable for IP Class {ip_class}.")
-        return
+        raise ValueError(f"Subnetting is not applicable for IP Class {ip_class}.")
     
     default_mask, default_prefix = default_subnet_mask(ip_class)
+    if new_prefix == default_prefix:
+        raise ValueError(f"/{new_prefix} is the Class {ip_class} classful network itself; "
+                         f"use /1-/{default_prefix - 1} to supernet or /{default_prefix + 1}-/30 to subnet.")
     if not (default_prefix < new_prefix <= 30):
-        print(f"\nError: Invalid CIDR prefix /{new_prefix} for a Class {ip_class} network (default /{default_prefix}).")
-        print(f"The new prefix must be between /{default_prefix + 1} and /30.")
-        return
+        raise ValueError(f"Invalid CIDR prefix /{new_prefix} for subnetting a Class {ip_class} network (default /{default_prefix}).\n"
+                         f"The new prefix must be between /{default_prefix + 1} and /30.")
     
     n_borrowed_bits = new_prefix - default_prefix
     mask_binary = '1' * new_prefix + '0' * (32 - new_prefix)
     mask_octets = [int(mask_binary[i:i+8], 2) for i in range(0, 32, 8)]
-    new_subnet_mask_str = ".".join(map(str, mask_octets))
-    
-    total_subnets = 2 ** n_borrowed_bits
     ips_per_subnet = 2 ** (32 - new_prefix)
-    assignable_hosts = ips_per_subnet - 2
     
-    # Calculate actual network address
-    network_ip = calculate_network_address(ip, new_prefix)
+    return {
+        'network_address': calculate_network_address(ip, new_prefix),
+        'ip_class': ip_class,
+        'default_mask': default_mask,
+        'default_prefix': default_prefix,
+        'new_prefix': new_prefix,
+        'subnet_mask': ".".join(map(str, mask_octets)),
+        'wildcard_mask': wildcard_mask(new_prefix),
+        'mask_binary': f"{mask_binary[:8]}.{mask_binary[8:16]}.{mask_binary[16:24]}.{mask_binary[24:32]}",
+        'bits_borrowed': n_borrowed_bits,
+        'total_subnets': 2 ** n_borrowed_bits,
+        'ips_per_subnet': ips_per_subnet,
+        'assignable_hosts': ips_per_subnet - 2,
+    }
+
+def calculate_supernetting(ip, new_prefix):
+    """Returns the figures for aggregating classful networks into a shorter prefix, raising ValueError if not applicable."""
+    ip_class = identify_class(ip)
+    if ip_class not in ['A', 'B', 'C']:
+        raise ValueError(f"Supernetting is not applicable for IP Class {ip_class}.")
+    
+    default_mask, default_prefix = default_subnet_mask(ip_class)
+    if not (0 < new_prefix < default_prefix):
+        raise ValueError(f"Invalid CIDR prefix /{new_prefix} for supernetting a Class {ip_class} network (default /{default_prefix}).\n"
+                         f"The new prefix must be between /1 and /{default_prefix - 1}.")
+    
+    start, end = network_interval(f"{ip}/{new_prefix}")
+    mask = (0xFFFFFFFF << (32 - new_prefix)) & 0xFFFFFFFF
+    return {
+        'network_address': int_to_ip(start),
+        'broadcast_address': int_to_ip(end),
+        'ip_class': ip_class,
+        'default_mask': default_mask,
+        'default_prefix': default_prefix,
+        'new_prefix': new_prefix,
+        'subnet_mask': int_to_ip(mask),
+        'bits_given_up': default_prefix - new_prefix,
+        'networks_aggregated': 2 ** (default_prefix - new_prefix),
+        'total_addresses': end - start + 1,
+    }
+
+def supernetting(ip, new_prefix):
+    """Performs supernetting calculations for a prefix shorter than the classful default."""
+    try:
+        result = calculate_supernetting(ip, new_prefix)
+    except ValueError as e:
+        print(f"\nError: {e}")
+        return
+    
+    print(f"\n{'='*60}")
+    print(f"SUPERNETTING CALCULATION RESULTS")
+    print(f"{'='*60}")
+    print(f"Original IP Address: {ip}")
+    print(f"Supernet Address: {result['network_address']}/{new_prefix}")
+    print(f"IP Class: {result['ip_class']}")
+    print(f"Default Subnet Mask: {result['default_mask']} (/{result['default_prefix']})")
+    print(f"New Supernet Mask: {result['subnet_mask']}")
+    print(f"Range: {result['network_address']} - {result['broadcast_address']}")
+    print(f"Bits Given Up by Network: {result['bits_given_up']}")
+    print(f"Class {result['ip_class']} Networks Aggregated: {result['networks_aggregated']}")
+    print(f"Total IP Addresses: {result['total_addresses']}")
+    print(f"{'='*60}\n")
+
+def subnetting(ip, new_prefix):
+    """Performs subnetting calculations based on a target CIDR prefix."""
+    ip_class = identify_class(ip)
+    if ip_class in ['A', 'B', 'C'] and new_prefix < default_subnet_mask(ip_class)[1]:
+        supernetting(ip, new_prefix)
+        return
+    
+    try:
+        result = calculate_subnetting(ip, new_prefix)
+    except ValueError as e:
+        print(f"\nError: {e}")
+        return
     
     print(f"\n{'='*60}")
     print(f"SUBNETTING CALCULATION RESULTS")
     print(f"{'='*60}")
     print(f"Original IP Address: {ip}")
-    print(f"Network Address: {network_ip}")
-    print(f"IP Class: {ip_class}")
-    print(f"Default Subnet Mask: {default_mask} (/{default_prefix})")
+    print(f"Network Address: {result['network_address']}")
+    print(f"IP Class: {result['ip_class']}")
+    print(f"Default Subnet Mask: {result['default_mask']} (/{result['default_prefix']})")
     print(f"New CIDR Prefix: /{new_prefix}")
-    print(f"New Subnet Mask: {new_subnet_mask_str}")
-    print(f"Subnet Mask (Binary): {mask_binary[:8]}.{mask_binary[8:16]}.{mask_binary[16:24]}.{mask_binary[24:32]}")
-    print(f"Bits Borrowed from Host: {n_borrowed_bits}")
-    print(f"Total Subnets Created: {total_subnets}")
-    print(f"Total IP Addresses per Subnet: {ips_per_subnet}")
-    print(f"Assignable Hosts per Subnet: {assignable_hosts}")
+    print(f"New Subnet Mask: {result['subnet_mask']}")
+    print(f"Wildcard Mask: {result['wildcard_mask']}")
+    print(f"Subnet Mask (Binary): {result['mask_binary']}")
+    print(f"Bits Borrowed from Host: {result['bits_borrowed']}")
+    print(f"Total Subnets Created: {result['total_subnets']}")
+    print(f"Total IP Addresses per Subnet: {result['ips_per_subnet']}")
+    print(f"Assignable Hosts per Subnet: {result['assignable_hosts']}")
     print(f"{'='*60}\n")
     
     # Display subnet ranges
-    if total_subnets <= 20:  # Only show ranges for reasonable number of subnets
-        display_subnet_ranges(network_ip, new_prefix, total_subnets, ips_per_subnet)
+    if result['total_subnets'] <= 20:  # Only show ranges for reasonable number of subnets
+        display_subnet_ranges(result['network_address'], new_prefix, result['total_subnets'], result['ips_per_subnet'])
+
+def int_to_ip(value):
+    """Formats a 32-bit integer as a dotted-quad IPv4 address."""
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+def wildcard_mask(prefix):
+    """Returns the wildcard (inverse) mask used by router ACLs for a CIDR prefix."""
+    return int_to_ip((1 << (32 - prefix)) - 1)
+
+def network_interval(network):
+    """Converts a CIDR network string into an inclusive (start, end) integer interval."""
+    address, _, prefix = network.strip().partition('/')
+    octets = address.split('.')
+    prefix = int(prefix) if prefix else 32
+    if len(octets) != 4 or not 0 <= prefix <= 32:
+        raise ValueError(f"Invalid network: {network.strip()}")
+    value = 0
+    for octet in octets:
+        octet = int(octet)
+        if not 0 <= octet <= 255:
+            raise ValueError(f"Invalid network: {network.strip()}")
+        value = (value << 8) | octet
+    host_bits = (1 << (32 - prefix)) - 1
+    start = value & ~host_bits
+    return start, start | host_bits
+
+def subnet_ranges(network_ip, new_prefix, count, start=0):
+    """Yields (network, broadcast, first_host, last_host) integers for consecutive subnets of a plan."""
+    base, _ = network_interval(f"{network_ip}/{new_prefix}")
+    size = 1 << (32 - new_prefix)
+    for network in range(base + start * size, base + (start + count) * size, size):
+        yield network, network + size - 1, network + 1, network + size - 2
+
+EXPORT_COLUMNS = ('network', 'broadcast', 'first_host', 'last_host', 'prefix')
+
+def subnet_column_batches(network_ip, new_prefix, total_subnets, batch_size=1 << 20):
+    """Yields {column: uint32 array} batches covering every subnet of a plan, in order."""
+    base, _ = network_interval(f"{network_ip}/{new_prefix}")
+    size = 1 << (32 - new_prefix)
+    for first in range(0, total_subnets, batch_size):
+        count = min(batch_size, total_subnets - first)
+        start = base + first * size
+        stop = start + count * size
+        yield {
+            'network': array('I', range(start, stop, size)),
+            'broadcast': array('I', range(start + size - 1, stop, size)),
+            'first_host': array('I', range(start + 1, stop, size)),
+            'last_host': array('I', range(start + size - 2, stop, size)),
+            'prefix': array('I', [new_prefix]) * count,
+        }
+
+def export_subnet_plan(ip, new_prefix, path, fmt='arrow', batch_size=1 << 20):
+    """Writes every subnet of a plan as uint32 columns and returns the number of rows written.
+
+    fmt is 'arrow' (Arrow IPC file, memory-mappable), 'parquet' (one row group
+    per batch) or 'raw' (a directory with one little-endian <column>.u32 file per
+    column, loadable with numpy.memmap). 'arrow' and 'parquet' need pyarrow.
+    """
+    result = calculate_subnetting(ip, new_prefix)
+    # The plan is every subnet of the classful network, wherever ip sits inside it
+    classful_network, _ = network_interval(f"{ip}/{result['default_prefix']}")
+    batches = subnet_column_batches(int_to_ip(classful_network), new_prefix, result['total_subnets'], batch_size)
+
+    if fmt == 'raw':
+        os.makedirs(path, exist_ok=True)
+        files = {name: open(os.path.join(path, f"{name}.u32"), 'wb') for name in EXPORT_COLUMNS}
+        try:
+            for batch in batches:
+                for name, column in batch.items():
+                    if sys.byteorder == 'big':
+                        column.byteswap()
+                    column.tofile(files[name])
+        finally:
+            for f in files.values():
+                f.close()
+        return result['total_subnets']
+
+    if fmt not in ('arrow', 'parquet'):
+        raise ValueError(f"Unknown export format '{fmt}'. Use arrow, parquet or raw.")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f"The {fmt} export needs pyarrow (pip install pyarrow); use fmt='raw' without it.")
+
+    schema = pa.schema([(name, pa.uint32()) for name in EXPORT_COLUMNS])
+    writer = pa.ipc.new_file(path, schema) if fmt == 'arrow' else pq.ParquetWriter(path, schema)
+    with writer:
+        for batch in batches:
+            # Wrap the array buffers directly instead of converting element by element
+            arrays = [pa.Array.from_buffers(pa.uint32(), len(batch[name]), [None, pa.py_buffer(batch[name])])
+                      for name in EXPORT_COLUMNS]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+    return result['total_subnets']
+
+def read_networks(path):
+    """Yields CIDR networks from a file, one per line, skipping blanks and # comments."""
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
+
+def _plan_events(networks, kind):
+    """Turns networks into sweep events ordered by start, larger blocks first."""
+    for network in networks:
+        start, end = network_interval(network)
+        prefix = 32 - (end - start).bit_length()
+        yield start, -end, kind, f"{int_to_ip(start)}/{prefix}"
+
+def compare_subnet_plans(existing, proposed, presorted=False):
+    """Sweeps a proposed plan against existing allocations and yields conflicts and free gaps.
+
+    Yields ('duplicate' | 'shadowed' | 'contains', proposed, existing) for every
+    proposed network that equals, sits inside or swallows an existing one, and
+    ('gap', first_ip, last_ip) for free space between existing allocations.
+    When proposed networks nest, each one that swallows an existing network is
+    reported for it; a proposed network inside several nested existing ones is
+    reported once, against the innermost.
+    With presorted=True both inputs are merged lazily, so files larger than
+    memory can be streamed. Each input must then be ordered by network address
+    and, for networks sharing an address, by prefix length with the larger
+    block (shorter prefix) first; out-of-order input raises ValueError.
+    """
+    existing_events = _plan_events(existing, 0)
+    proposed_events = _plan_events(proposed, 1)
+    if presorted:
+        events = heapq.merge(existing_events, proposed_events)
+    else:
+        events = sorted([*existing_events, *proposed_events])
+
+    # CIDR blocks either nest or are disjoint, so each stack only holds the
+    # chain of blocks enclosing the current address
+    open_existing, open_proposed = [], []
+    covered_to = None
+    previous = None
+    for start, neg_end, kind, network in events:
+        if previous is not None and (start, neg_end) < previous:
+            raise ValueError(f"Networks are not sorted: {network} comes after a later or smaller block")
+        previous = (start, neg_end)
+        end = -neg_end
+        while open_existing and open_existing[-1][0] < start:
+            open_existing.pop()
+        while open_proposed and open_proposed[-1][0] < start:
+            open_proposed.pop()
+
+        if kind == 0:
+            if covered_to is not None and start > covered_to + 1:
+                yield 'gap', int_to_ip(covered_to + 1), int_to_ip(start - 1)
+            covered_to = end if covered_to is None else max(covered_to, end)
+            for _, _, outer in open_proposed:
+                yield 'contains', outer, network
+            open_existing.append((end, start, network))
+        else:
+            if open_existing:
+                outer_end, outer_start, outer = open_existing[-1]
+                same = (outer_start, outer_end) == (start, end)
+                yield ('duplicate' if same else 'shadowed'), network, outer
+            open_proposed.append((end, start, network))
+
+def display_plan_conflicts(existing_path, proposed_path, presorted=False):
+    """Prints the conflicts and free gaps between two network list files."""
+    counts = {'duplicate': 0, 'shadowed': 0, 'contains': 0, 'gap': 0}
+    existing = read_networks(existing_path)
+    proposed = read_networks(proposed_path)
+    for kind, a, b in compare_subnet_plans(existing, proposed, presorted):
+        counts[kind] += 1
+        if kind == 'gap':
+            print(f"Free gap: {a} - {b}")
+        elif kind == 'contains':
+            print(f"Conflict: proposed {a} contains existing {b}")
+        elif kind == 'shadowed':
+            print(f"Conflict: proposed {a} is inside existing {b}")
+        else:
+            print(f"Conflict: proposed {a} duplicates existing {b}")
+    print(f"\n{counts['duplicate']} duplicates, {counts['shadowed']} shadowed, "
+          f"{counts['contains']} containing, {counts['gap']} free gaps")
+
+def merge_intervals(intervals):
+    """Merges sorted (start, end) intervals that overlap or touch into contiguous runs."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def interval_to_cidrs(start, end):
+    """Splits an inclusive integer interval into the fewest CIDR blocks that cover it exactly."""
+    blocks = []
+    while start <= end:
+        # Largest block aligned at start that still fits in what is left
+        size = start & -start if start else 1 << 32
+        while size > end - start + 1:
+            size >>= 1
+        blocks.append((start, start + size - 1))
+        start += size
+    return blocks
+
+def covering_prefix(start, end):
+    """Returns the smallest CIDR block (start, end) that contains an interval."""
+    host_bits = (start ^ end).bit_length()
+    block = start >> host_bits << host_bits
+    return block, block | ((1 << host_bits) - 1)
+
+def summarize_routes(networks, mode='summary', max_extra=None):
+    """Summarizes routes into as few prefixes as possible, returning (network, covered, extra) tuples.
+
+    mode 'summary' gives one shortest covering prefix per contiguous block of
+    routes, 'classful' summarizes each route to its classful network (auto-summary),
+    and 'exact' gives the classless CIDR list that covers the routes with no
+    extra space. covered and extra count the route and non-route addresses
+    inside each summary.
+
+    In 'summary' mode a block whose covering prefix would take in more than
+    max_extra non-route addresses is given as its exact CIDR list instead; by
+    default a summary may add at most as many addresses as its routes cover.
+    """
+    routes = sorted(network_interval(network) for network in networks)
+    runs = merge_intervals(routes)
+
+    if mode == 'exact':
+        summaries = [block for start, end in runs for block in interval_to_cidrs(start, end)]
+    elif mode == 'summary':
+        summaries = []
+        for start, end in runs:
+            cover_start, cover_end = covering_prefix(start, end)
+            extra = (cover_end - cover_start) - (end - start)
+            if extra <= (end - start + 1 if max_extra is None else max_extra):
+                summaries.append((cover_start, cover_end))
+            else:
+                summaries.extend(interval_to_cidrs(start, end))
+    elif mode == 'classful':
+        summaries = []
+        for start, end in routes:
+            # Classful default prefix straight from the first octet (A /8, B /16, C /24)
+            first_octet = start >> 24
+            default_prefix = 8 if first_octet < 128 else 16 if first_octet < 192 else 24 if first_octet < 224 else None
+            if default_prefix and end - start + 1 < 1 << (32 - default_prefix):
+                start, end = network_interval(f"{int_to_ip(start)}/{default_prefix}")
+            summaries.append((start, end))
+    else:
+        raise ValueError(f"Unknown summarization mode '{mode}'. Use summary, classful or exact.")
+
+    # Prefixes either nest or are disjoint, so dropping the ones inside an
+    # earlier, larger prefix leaves a sorted list of disjoint summaries
+    summaries.sort(key=lambda block: (block[0], -block[1]))
+    kept = []
+    for start, end in summaries:
+        if not kept or start > kept[-1][1]:
+            kept.append((start, end))
+
+    result = []
+    i, n_runs = 0, len(runs)
+    for start, end in kept:
+        while i < n_runs and runs[i][1] < start:
+            i += 1
+        covered = 0
+        j = i
+        while j < n_runs and runs[j][0] <= end:
+            covered += min(end, runs[j][1]) - max(start, runs[j][0]) + 1
+            j += 1
+        prefix = 32 - (end - start + 1).bit_length() + 1
+        result.append((f"{int_to_ip(start)}/{prefix}", covered, end - start + 1 - covered))
+    return result
+
+def display_route_summary(networks, mode='summary', max_extra=None):
+    """Prints the summary routes for a set of networks."""
+    summaries = summarize_routes(networks, mode, max_extra)
+    print(f"\n{'Summary Route':<20} {'Route Addresses':>16} {'Extra Addresses':>16}")
+    print("-" * 54)
+    for network, covered, extra in summaries[:50]:
+        print(f"{network:<20} {covered:>16} {extra:>16}")
+    if len(summaries) > 50:
+        print(f"... and {len(summaries) - 50} more summary routes")
+    print(f"\n{len(summaries)} summary routes, {sum(extra for _, _, extra in summaries)} extra addresses covered")
+
+# Bit flags for special-purpose address ranges (RFC 6890 and friends)
+SPECIAL_PRIVATE = 1        # RFC 1918
+SPECIAL_CGNAT = 2          # RFC 6598 shared address space
+SPECIAL_LOOPBACK = 4
+SPECIAL_LINK_LOCAL = 8
+SPECIAL_MULTICAST = 16
+SPECIAL_DOCUMENTATION = 32 # TEST-NET-1/2/3
+SPECIAL_RESERVED = 64      # "this network", IETF protocol, benchmarking, class E
+SPECIAL_BOGON = 128        # anything that should never appear as a public source
+
+SPECIAL_FLAG_NAMES = {
+    SPECIAL_PRIVATE: 'private', SPECIAL_CGNAT: 'cgnat', SPECIAL_LOOPBACK: 'loopback',
+    SPECIAL_LINK_LOCAL: 'link-local', SPECIAL_MULTICAST: 'multicast',
+    SPECIAL_DOCUMENTATION: 'documentation', SPECIAL_RESERVED: 'reserved', SPECIAL_BOGON: 'bogon',
+}
+
+SPECIAL_RANGES = [
+    ('0.0.0.0/8', SPECIAL_RESERVED | SPECIAL_BOGON),
+    ('10.0.0.0/8', SPECIAL_PRIVATE | SPECIAL_BOGON),
+    ('100.64.0.0/10', SPECIAL_CGNAT | SPECIAL_BOGON),
+    ('127.0.0.0/8', SPECIAL_LOOPBACK | SPECIAL_BOGON),
+    ('169.254.0.0/16', SPECIAL_LINK_LOCAL | SPECIAL_BOGON),
+    ('172.16.0.0/12', SPECIAL_PRIVATE | SPECIAL_BOGON),
+    ('192.0.0.0/24', SPECIAL_RESERVED | SPECIAL_BOGON),
+    ('192.0.2.0/24', SPECIAL_DOCUMENTATION | SPECIAL_BOGON),
+    ('192.168.0.0/16', SPECIAL_PRIVATE | SPECIAL_BOGON),
+    ('198.18.0.0/15', SPECIAL_RESERVED | SPECIAL_BOGON),
+    ('198.51.100.0/24', SPECIAL_DOCUMENTATION | SPECIAL_BOGON),
+    ('203.0.113.0/24', SPECIAL_DOCUMENTATION | SPECIAL_BOGON),
+    ('224.0.0.0/4', SPECIAL_MULTICAST | SPECIAL_BOGON),
+    ('240.0.0.0/4', SPECIAL_RESERVED | SPECIAL_BOGON),
+]
+
+_special_tables = None
+
+def _build_special_tables():
+    """Compiles SPECIAL_RANGES into per-octet 256-byte translate tables.
+
+    Ranges up to /8 go in a first-octet table, /9-/16 in second-octet tables
+    keyed by first octet, and /17-/24 in third-octet tables keyed by the first two.
+    """
+    first = bytearray(256)
+    second, third = {}, {}
+    for network, flags in SPECIAL_RANGES:
+        start, end = network_interval(network)
+        prefix = 32 - (end - start).bit_length()
+        if prefix > 24:
+            raise ValueError(f"Special range {network} is longer than /24")
+        for block in range(start >> 8, (end >> 8) + 1):
+            o1, o2, o3 = block >> 16, (block >> 8) & 255, block & 255
+            if prefix <= 8:
+                first[o1] |= flags
+            elif prefix <= 16:
+                second.setdefault(o1, bytearray(256))[o2] |= flags
+            else:
+                third.setdefault((o1, o2), bytearray(256))[o3] |= flags
+    return bytes(first), {k: bytes(v) for k, v in second.items()}, {k: bytes(v) for k, v in third.items()}
+
+def classify_addresses(addresses):
+    """Tags uint32 IPv4 addresses with SPECIAL_* bit flags, returning one flag byte per address.
+
+    The work is done with bytes.translate() over the octet columns and bitwise
+    operations on big integers, so a batch costs a few C-level passes however
+    large it is instead of a Python call per address.
+    """
+    global _special_tables
+    if _special_tables is None:
+        _special_tables = _build_special_tables()
+    first_table, second_tables, third_tables = _special_tables
+
+    words = array('I', addresses)
+    if sys.byteorder == 'little':
+        words.byteswap()
+    raw = words.tobytes()
+    octets = raw[0::4], raw[1::4], raw[2::4]
+    count = len(octets[0])
+
+    masks = {}
+    def equals(column, value):
+        # 0xFF in every position where the octet equals value, as one big integer
+        if (column, value) not in masks:
+            selector = bytes(255 if i == value else 0 for i in range(256))
+            masks[column, value] = int.from_bytes(octets[column].translate(selector), 'big')
+        return masks[column, value]
+
+    flags = int.from_bytes(octets[0].translate(first_table), 'big')
+    for o1, table in second_tables.items():
+        flags |= int.from_bytes(octets[1].translate(table), 'big') & equals(0, o1)
+    for (o1, o2), table in third_tables.items():
+        flags |= int.from_bytes(octets[2].translate(table), 'big') & equals(0, o1) & equals(1, o2)
+    return flags.to_bytes(count, 'big')
+
+def special_range_tags(ip):
+    """Lists the special-purpose range tags that apply to a single IPv4 address."""
+    flags = classify_addresses([network_interval(ip)[0]])[0]
+    return [name for flag, name in SPECIAL_FLAG_NAMES.items() if flags & flag]
+
+def parse_acl_rule(line):
+    """Parses 'permit|deny <source> <destination>' where each side is a CIDR, a host IP or 'any'."""
+    parts = line.split('#', 1)[0].split()
+    if len(parts) != 3 or parts[0].lower() not in ('permit', 'deny'):
+        raise ValueError(f"Invalid ACL rule: {line.strip()}")
+    action, source, destination = parts
+    for side in (source, destination):
+        if side.lower() != 'any':
+            network_interval(side)
+    return action.lower(), source, destination
+
+def _acl_interval(side):
+    """Converts one side of an ACL rule into an integer interval."""
+    return (0, 0xFFFFFFFF) if side.lower() == 'any' else network_interval(side)
+
+def _compile_acl_dimension(intervals):
+    """Splits the address space at rule boundaries into intervals tagged with a bitmask of the matching rules."""
+    # A rule's bit switches on at its start and off just past its end
+    toggles = {}
+    for index, (start, end) in enumerate(intervals):
+        toggles[start] = toggles.get(start, 0) ^ (1 << index)
+        if end < 0xFFFFFFFF:
+            toggles[end + 1] = toggles.get(end + 1, 0) ^ (1 << index)
+    starts, masks = [0], [0]
+    for boundary in sorted(toggles):
+        mask = masks[-1] ^ toggles[boundary]
+        if boundary == 0:
+            masks[0] = mask
+        else:
+            starts.append(boundary)
+            masks.append(mask)
+    return starts, masks
+
+def compile_acl(rules):
+    """Compiles ordered (action, source, destination) rules into a first-match lookup table.
+
+    Each dimension becomes sorted, merged intervals tagged with a bitmask of the
+    rules matching there. A packet matches the lowest rule set in both masks,
+    so lookups are two binary searches and an AND, however many rules there are.
+    """
+    rules = [parse_acl_rule(rule) if isinstance(rule, str) else rule for rule in rules]
+    source_starts, source_masks = _compile_acl_dimension([_acl_interval(r[1]) for r in rules])
+    dest_starts, dest_masks = _compile_acl_dimension([_acl_interval(r[2]) for r in rules])
+    return {
+        'rules': rules,
+        'permit': [r[0] == 'permit' for r in rules],
+        'source': (source_starts, source_masks),
+        'destination': (dest_starts, dest_masks),
+    }
+
+def evaluate_acl(acl, sources, destinations):
+    """Evaluates flows against a compiled ACL.
+
+    Returns (decisions, hits): one byte per flow (1 permit, 0 deny) and a match
+    count per rule, with the implicit deny at the end. Flows that fall in the
+    same pair of intervals share one lookup.
+    """
+    source_starts, source_masks = acl['source']
+    dest_starts, dest_masks = acl['destination']
+    permit = acl['permit']
+    default = len(permit)
+    hits = [0] * (default + 1)
+    decisions = bytearray()
+    memo = {}
+    for source, destination in zip(sources, destinations):
+        key = (bisect.bisect_right(source_starts, source) - 1, bisect.bisect_right(dest_starts, destination) - 1)
+        rule = memo.get(key)
+        if rule is None:
+            mask = source_masks[key[0]] & dest_masks[key[1]]
+            rule = memo[key] = (mask & -mask).bit_length() - 1 if mask else default
+        hits[rule] += 1
+        decisions.append(rule != default and permit[rule])
+    return bytes(decisions), hits
+
+def format_acl(rules, number=101):
+    """Renders rules as extended access-list lines with wildcard masks."""
+    def side(text):
+        if text.lower() == 'any':
+            return 'any'
+        start, end = network_interval(text)
+        if start == end:
+            return f"host {int_to_ip(start)}"
+        return f"{int_to_ip(start)} {int_to_ip(end - start)}"
+    return [f"access-list {number} {action} ip {side(source)} {side(destination)}" for action, source, destination in rules]
+
+def display_acl_test(rules_path, flows_path):
+    """Compiles an ACL file and prints how a file of 'source destination' flows is matched."""
+    acl = compile_acl(read_networks(rules_path))
+    sources, destinations = array('I'), array('I')
+    for line in read_networks(flows_path):
+        source, destination = line.split()[:2]
+        sources.append(network_interval(source)[0])
+        destinations.append(network_interval(destination)[0])
+    
+    decisions, hits = evaluate_acl(acl, sources, destinations)
+    print()
+    for line, count in zip(format_acl(acl['rules']), hits):
+        print(f"{count:>10}  {line}")
+    print(f"{hits[-1]:>10}  (implicit deny)")
+    print(f"\n{len(decisions)} flows: {sum(decisions)} permitted, {len(decisions) - sum(decisions)} denied")
 
 def interactive_menu():
     """Interactive menu for subnetting operations."""
@@ -136,9 +692,13 @@ def interactive_menu():
         print("="*50)
         print("1. Calculate Subnetting")
         print("2. Show IP Class Information") 
-        print("3. Exit")
+        print("3. Check Plan Against Existing Allocations")
+        print("4. Export All Subnets of a Plan")
+        print("5. Summarize Routes (Supernetting)")
+        print("6. Test ACL Against Flows")
+        print("7. Exit")
         
-        choice = input("\nEnter your choice (1-3): ").strip()
+        choice = input("\nEnter your choice (1-7): ").strip()
         
         if choice == "1":
             ip_address = input("Enter an IP address (e.g., 192.168.1.0): ").strip()
@@ -167,12 +727,54 @@ def interactive_menu():
                 print(f"Default Subnet Mask: {mask} (/{prefix})")
             else:
                 print(f"IP Class: {ip_class}")
+            if ip_class != 'Invalid IP':
+                print(f"Special Ranges: {', '.join(special_range_tags(ip_address)) or 'none (public unicast)'}")
                 
         elif choice == "3":
+            existing_path = input("File of existing networks (one CIDR per line): ").strip()
+            proposed_path = input("File of proposed networks (one CIDR per line): ").strip()
+            presorted = input("Are both files sorted by address? (y/n): ").strip().lower() == "y"
+            try:
+                display_plan_conflicts(existing_path, proposed_path, presorted)
+            except (OSError, ValueError) as e:
+                print(f"\nCould not compare plans: {e}")
+                
+        elif choice == "4":
+            ip_address = input("Enter an IP address (e.g., 10.0.0.0): ").strip()
+            cidr_input = input("Enter the new CIDR prefix (e.g., /30): ").strip()
+            fmt = input("Format - arrow, parquet or raw: ").strip().lower()
+            path = input("Output path: ").strip()
+            try:
+                if not cidr_input.startswith('/'):
+                    raise ValueError("CIDR prefix must start with '/'.")
+                rows = export_subnet_plan(ip_address, int(cidr_input[1:]), path, fmt)
+                print(f"\nExported {rows} subnets to {path}")
+            except (ValueError, ImportError, OSError) as e:
+                print(f"\nCould not export: {e}")
+                
+        elif choice == "5":
+            source = input("Enter networks (comma separated) or a file with one CIDR per line: ").strip()
+            mode = input("Mode - summary, classful or exact: ").strip().lower() or 'summary'
+            max_extra = input("Most extra addresses per summary (blank: no more than its routes cover): ").strip()
+            try:
+                networks = read_networks(source) if os.path.isfile(source) else source.split(',')
+                display_route_summary(networks, mode, int(max_extra) if max_extra else None)
+            except (ValueError, OSError) as e:
+                print(f"\nCould not summarize: {e}")
+                
+        elif choice == "6":
+            rules_path = input("File of ACL rules (permit|deny <source> <destination> per line): ").strip()
+            flows_path = input("File of flows (<source ip> <destination ip> per line): ").strip()
+            try:
+                display_acl_test(rules_path, flows_path)
+            except (ValueError, OSError) as e:
+                print(f"\nCould not test ACL: {e}")
+                
+        elif choice == "7":
             print("Goodbye!")
             break
         else:
-            print("Invalid choice. Please select 1, 2, or 3.")
+            print("Invalid choice. Please select 1-7.")
 
 if __name__ == "__main__":
     # Check if user wants interactive mode or single calculation
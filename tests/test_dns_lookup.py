@@ -0,0 +1,327 @@
+import importlib.util
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "dns_lookup", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "import socket.py"))
+dns_lookup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dns_lookup)
+
+
+@pytest.fixture
+def clock():
+    clock = dns_lookup.FakeClock()
+    dns_lookup.set_clock(clock)
+    dns_lookup.reset_cache()
+    yield clock
+    dns_lookup.set_clock()
+    dns_lookup.reset_cache()
+
+
+class Upstream:
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.calls = 0
+        self.up = True
+
+    def __call__(self, key):
+        self.calls += 1
+        if not self.up:
+            raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+        return f"{key}-{self.calls}", self.ttl
+
+
+def wait_for_refresh():
+    deadline = time.monotonic() + 2
+    while dns_lookup._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_answers_are_reused_until_their_ttl_runs_out(clock):
+    upstream = Upstream(ttl=10)
+    assert dns_lookup._cached("A", "example.test", upstream) == "example.test-1"
+    clock.advance(9)
+    assert dns_lookup._cached("A", "example.test", upstream) == "example.test-1"
+    assert upstream.calls == 1
+    clock.advance(10 + dns_lookup.STALE_GRACE)
+    assert dns_lookup._cached("A", "example.test", upstream) == "example.test-2"
+    assert dns_lookup.cache_stats()["misses"] == 2
+
+
+def test_expired_answer_is_served_while_upstream_is_down(clock):
+    upstream = Upstream(ttl=10)
+    dns_lookup._cached("A", "example.test", upstream)
+    upstream.up = False
+    clock.advance(11)
+    for _ in range(5):
+        assert dns_lookup._cached("A", "example.test", upstream) == "example.test-1"
+        wait_for_refresh()
+    # One failed refresh holds off the next until the recheck timer runs out
+    assert upstream.calls == 2
+    clock.advance(dns_lookup.STALE_RECHECK)
+    assert dns_lookup._cached("A", "example.test", upstream) == "example.test-1"
+    wait_for_refresh()
+    assert upstream.calls == 3
+    assert dns_lookup.cache_stats()["stale"] == 6
+
+
+def test_cached_failures_are_not_prefetched(clock):
+    upstream = Upstream()
+    upstream.up = False
+    for _ in range(dns_lookup.PREFETCH_MIN_HITS + 2):
+        with pytest.raises(socket.gaierror):
+            dns_lookup._cached("A", "missing.test", upstream)
+        clock.advance(dns_lookup.NEGATIVE_TTL / 10)
+    wait_for_refresh()
+    assert upstream.calls == 1
+    assert dns_lookup.cache_stats()["prefetches"] == 0
+
+
+def test_short_ttl_answers_are_prefetched_once_per_lifetime(clock):
+    upstream = Upstream(ttl=5)
+    for _ in range(1000):
+        assert dns_lookup._cached("A", "short.test", upstream).startswith("short.test-")
+        clock.advance(0.001)
+        wait_for_refresh()
+    assert upstream.calls == 1
+    clock.advance(3.7)  # into the last 10% of the TTL
+    for _ in range(dns_lookup.PREFETCH_MIN_HITS + 10):
+        dns_lookup._cached("A", "short.test", upstream)
+        wait_for_refresh()
+    assert upstream.calls == 2
+    assert dns_lookup.cache_stats()["prefetches"] == 1
+
+
+@pytest.fixture
+def shared():
+    cache = dns_lookup.SharedCache(slots=64, stripes=4)
+    dns_lookup.use_shared_cache(cache)
+    yield cache
+    dns_lookup.use_shared_cache()
+    cache.close()
+
+
+def test_shared_cache_answers_and_failures_expire(clock, shared):
+    upstream = Upstream(ttl=10)
+    shared.put("A", "example.test", ("192.0.2.1", None, 10.0, 10))
+    shared.put("PTR", "192.0.2.1", (None, socket.herror(1, "Unknown host"), 5.0, 5))
+    assert dns_lookup._cached("A", "example.test", upstream) == "192.0.2.1"
+    with pytest.raises(socket.herror):
+        dns_lookup._cached("PTR", "192.0.2.1", upstream)
+    assert upstream.calls == 0
+    clock.advance(10 + dns_lookup.STALE_GRACE)
+    dns_lookup.reset_cache()
+    assert dns_lookup._cached("A", "example.test", upstream) == "example.test-1"
+    assert shared.get("A", "example.test")[0] == "example.test-1"
+
+
+def test_shared_cache_bucket_evicts_the_soonest_expiring_entry(clock, shared):
+    keys = [f"host{i}.test" for i in range(200)]
+    for i, key in enumerate(keys):
+        shared.put("A", key, ("192.0.2.1", None, 1000.0 + i, 60))
+    # 200 keys into 64 slots: each full bucket gives up its soonest-expiring entry
+    survivors = [key for key in keys if shared.get("A", key) is not None]
+    assert 0 < len(survivors) <= 64
+    assert shared.get("A", keys[-1]) is not None
+
+
+def resolve_in_worker(cache, names, upstream_calls, results):
+    dns_lookup.set_clock()
+    dns_lookup.reset_cache()
+    dns_lookup.use_shared_cache(cache)
+
+    def upstream(name):
+        with upstream_calls.get_lock():
+            upstream_calls.value += 1
+        return "192.0.2.%d" % len(name), 60
+
+    answers = [dns_lookup._cached("A", name, upstream) for name in names]
+    results.put((answers, dns_lookup.cache_stats()["shared_hits"]))
+    cache.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_worker_processes_share_one_warm_cache():
+    context = multiprocessing.get_context("fork")
+    cache = dns_lookup.SharedCache(slots=1024, context=context)
+    names = [f"host{i}.test" for i in range(50)]
+    upstream_calls = context.Value("i", 0)
+    results = context.Queue()
+    try:
+        for _ in range(2):
+            worker = context.Process(target=resolve_in_worker, args=(cache, names, upstream_calls, results))
+            worker.start()
+            worker.join(10)
+            assert worker.exitcode == 0
+        (first, first_hits), (second, second_hits) = results.get(timeout=5), results.get(timeout=5)
+    finally:
+        cache.close()
+    assert first == second
+    assert upstream_calls.value == len(names)
+    assert (first_hits, second_hits) == (0, len(names))
+
+
+def test_concurrent_misses_share_one_upstream_lookup(clock):
+    release = threading.Event()
+    calls = []
+
+    def slow(key):
+        calls.append(key)
+        release.wait(2)
+        return "192.0.2.1", None
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dns_lookup._cached("A", "busy.test", slow)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while dns_lookup.cache_stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ["busy.test"]
+    assert results == ["192.0.2.1"] * 8
+    assert dns_lookup.cache_stats()["coalesced"] == 7
+
+
+def test_fake_clock_drives_lookup_timeouts(clock):
+    release = threading.Event()
+
+    def stuck(item):
+        release.wait(2)
+        return item
+
+    results = dns_lookup.resolve_many(["a", "b"], lookup=stuck, workers=1, timeout=5)
+    threading.Timer(0.1, clock.advance, args=(6,)).start()
+    try:
+        assert next(results) == "Lookup timed out"
+    finally:
+        release.set()
+    assert list(results) == ["b"]  # its deadline starts when it reaches the worker
+
+
+def test_closed_stub_nameserver_stops_answering(clock):
+    stub = dns_lookup.StubNameserver()
+    host, port = stub.address.split(":")
+    conn = socket.create_connection((host, int(port)), timeout=2)
+    stub.close()
+    query = dns_lookup._build_query(1, dns_lookup._build_question("example.test", dns_lookup.QTYPE_A))
+    try:
+        conn.sendall(len(query).to_bytes(2, "big") + query)
+    except OSError:
+        pass
+    assert conn.recv(2) == b""
+    conn.close()
+    with pytest.raises(OSError):
+        socket.create_connection((host, int(port)), timeout=2)
+
+
+@pytest.fixture
+def nameservers():
+    stubs = []
+
+    def start(count=1, **behaviour):
+        stubs.extend(dns_lookup.StubNameserver(**behaviour) for _ in range(count))
+        dns_lookup.use_tcp_nameservers([stub.address for stub in stubs[-count:]], timeout=1.0)
+        return stubs[-count:]
+
+    yield start
+    dns_lookup.use_tcp_nameservers([])
+    for stub in stubs:
+        stub.close()
+
+
+def test_tcp_answer_ttl_is_honoured(clock, nameservers):
+    stub, = nameservers(ttl=7)
+    ip = dns_lookup.url_to_ip("example.test")
+    assert ip.startswith("10.")
+    clock.advance(6)
+    assert dns_lookup.url_to_ip("example.test") == ip
+    assert stub.stats["queries"] == 1
+    clock.advance(2 + dns_lookup.STALE_GRACE)
+    assert dns_lookup.url_to_ip("example.test") == ip
+    assert stub.stats["queries"] == 2
+
+
+def test_tcp_ptr_answer_with_a_compressed_name(clock, nameservers):
+    nameservers(ttl=42)
+    assert dns_lookup._tcp_reverse("192.0.2.1") == ("host-192-0-2-1.in-addr.arpa", 42)
+    assert dns_lookup.ip_to_url("192.0.2.1") == "host-192-0-2-1.in-addr.arpa"
+
+
+def test_tcp_nxdomain_is_an_invalid_domain(clock, nameservers):
+    nameservers(nxdomain={"gone.test"})
+    assert dns_lookup.url_to_ip("gone.test") == "Invalid domain name"
+    with pytest.raises(socket.gaierror) as raised:
+        dns_lookup._tcp_forward("gone.test")
+    assert raised.value.errno == socket.EAI_NONAME
+
+
+def test_tcp_servfail_is_a_temporary_failure(clock, nameservers):
+    nameservers(servfail=1.0)
+    with pytest.raises(socket.gaierror) as raised:
+        dns_lookup._tcp_forward("broken.test")
+    assert raised.value.errno == socket.EAI_AGAIN
+
+
+def test_tcp_lookups_fail_over_when_a_server_closes(clock, nameservers):
+    down, up = nameservers(count=2)
+    dns_lookup._tcp_forward("warm.test")
+    deadline = time.monotonic() + 2
+    while len(dns_lookup._pool.connections) < 4 and time.monotonic() < deadline:  # both servers connected
+        time.sleep(0.01)
+    assert len(dns_lookup._pool.connections) == 4
+    down.close()
+    for i in range(8):
+        assert dns_lookup._tcp_forward(f"host{i}.test")[0].startswith("10.")
+    assert up.stats["queries"] >= 8
+
+
+def test_slow_nameserver_does_not_hold_up_a_healthy_one():
+    # A listener whose accept queue is full leaves new connects hanging
+    slow = socket.socket()
+    slow.bind(("127.0.0.1", 0))
+    slow.listen(0)
+    backlog = []
+    for _ in range(3):
+        conn = socket.socket()
+        conn.setblocking(False)
+        conn.connect_ex(slow.getsockname())
+        backlog.append(conn)
+    stub = dns_lookup.StubNameserver()
+    dns_lookup.use_tcp_nameservers(["127.0.0.1:%d" % slow.getsockname()[1], stub.address], timeout=1.0)
+    try:
+        started = time.monotonic()
+        threads = [threading.Thread(target=dns_lookup._tcp_forward, args=(f"host{i}.test",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - started < 0.5
+        assert stub.stats["queries"] == 4
+    finally:
+        dns_lookup.use_tcp_nameservers([])
+        stub.close()
+        for conn in backlog + [slow]:
+            conn.close()
+
+
+def test_benchmark_leaves_the_session_cache_alone(clock):
+    upstream = Upstream()
+    dns_lookup._cached("A", "kept.test", upstream)
+    backend = dns_lookup._forward_lookup
+    results = dns_lookup.benchmark_resolver(lookups=300, names=50, workers=(4,), ttl=5,
+                                            seconds_per_lookup=0.1, latency=0.0)
+    assert results[0]["failures"] == 0
+    assert results[0]["stale"] > 0
+    assert dns_lookup._forward_lookup is backend
+    assert dns_lookup._clock is clock
+    assert dns_lookup._cached("A", "kept.test", upstream) == "kept.test-1"
+    assert dns_lookup.cache_stats()["misses"] == 1
@@ -0,0 +1,19 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subnet_service
+
+
+def test_enumerate_offsets_index_the_classful_plan():
+    subnets = subnet_service.enumerate_subnets('192.168.1.200', 26, 3, 2)
+    assert [s['network'] for s in subnets] == ['192.168.1.192']
+
+
+def test_service_rejects_what_the_library_rejects():
+    response = subnet_service.handle_request(json.dumps({'op': 'subnet', 'ip': '010.1.1.1', 'prefix': 26}))
+    assert 'error' in response
+    response = subnet_service.handle_request(json.dumps({'op': 'subnet', 'ip': '10.1.1.1', 'prefix': 26}))
+    assert response['result']['network_address'] == '10.1.1.0'
@@ -0,0 +1,77 @@
+import os
+import sys
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subnetting
+
+
+def read_column(directory, name):
+    column = array('I')
+    with open(os.path.join(directory, f"{name}.u32"), 'rb') as f:
+        column.frombytes(f.read())
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def test_export_covers_exactly_the_classful_network(tmp_path):
+    rows = subnetting.export_subnet_plan('10.200.0.0', 24, str(tmp_path), 'raw')
+    network = read_column(str(tmp_path), 'network')
+    broadcast = read_column(str(tmp_path), 'broadcast')
+    start, end = subnetting.network_interval('10.0.0.0/8')
+    assert rows == len(network) == 65536
+    assert network[0] == start
+    assert broadcast[-1] == end
+
+
+def test_classful_prefix_error_points_at_both_directions():
+    try:
+        subnetting.calculate_subnetting('192.168.1.0', 24)
+    except ValueError as e:
+        assert '/1-/23 to supernet' in str(e) and '/25-/30 to subnet' in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_presorted_plans_reject_out_of_order_input():
+    existing = ['10.0.2.0/24', '10.0.0.0/24']
+    try:
+        list(subnetting.compare_subnet_plans(existing, [], presorted=True))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    sorted_existing = ['10.0.0.0/16', '10.0.0.0/24', '10.0.2.0/24']
+    conflicts = list(subnetting.compare_subnet_plans(sorted_existing, ['10.0.1.0/24'], presorted=True))
+    assert conflicts == [('shadowed', '10.0.1.0/24', '10.0.0.0/16')]
+
+
+def test_nested_proposed_networks_each_report_what_they_contain():
+    conflicts = list(subnetting.compare_subnet_plans(['10.0.0.0/24'], ['10.0.0.0/20', '10.0.0.0/16']))
+    assert conflicts == [('contains', '10.0.0.0/16', '10.0.0.0/24'),
+                         ('contains', '10.0.0.0/20', '10.0.0.0/24')]
+
+
+def test_summary_mode_bounds_the_extra_space():
+    assert subnetting.summarize_routes(['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24']) == [
+        ('10.0.0.0/22', 768, 256)]
+    # One cover for these would be 8.0.0.0/6, attracting traffic for 8/8 and 11/8
+    assert subnetting.summarize_routes(['9.255.255.0/24', '10.0.0.0/24']) == [
+        ('9.255.255.0/24', 256, 0), ('10.0.0.0/24', 256, 0)]
+    assert subnetting.summarize_routes(['9.255.255.0/24', '10.0.0.0/24'], max_extra=1 << 26) == [
+        ('8.0.0.0/6', 512, 67108352)]
+    assert subnetting.summarize_routes(['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24'], max_extra=0) == [
+        ('10.0.0.0/23', 512, 0), ('10.0.2.0/24', 256, 0)]
+
+
+def test_classful_mode_summarizes_to_the_classful_network():
+    assert subnetting.summarize_routes(['10.1.0.0/16', '10.2.0.0/16', '172.16.5.0/24', '192.168.1.128/25'],
+                                       'classful') == [
+        ('10.0.0.0/8', 131072, 16646144), ('172.16.0.0/16', 256, 65280), ('192.168.1.0/24', 128, 128)]
+
+
+def test_exact_mode_covers_only_the_routes():
+    assert subnetting.summarize_routes(['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/25', '10.0.2.0/24'], 'exact') == [
+        ('10.0.0.0/23', 512, 0), ('10.0.2.0/24', 256, 0)]